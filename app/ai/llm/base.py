@@ -3,8 +3,9 @@ LLM客户端抽象基类
 
 定义统一的接口，所有provider必须实现
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import AsyncIterator,List
+from typing import AsyncIterator, List, Union
 from app.ai.llm.types import LLMRequest, LLMResponse, StreamChunk, EmbeddingRequest, EmbeddingResponse
 
 
@@ -64,6 +65,34 @@ class BaseLLMClient(ABC):
         """
         pass
 
+    async def chat_many(
+        self,
+        requests: List[LLMRequest],
+        max_concurrency: int = 10,
+    ) -> List[Union[LLMResponse, BaseException]]:
+        """
+        并发执行多个非流式对话（批量筛选简历、批量意图识别等场景）
+
+        并发上限由客户端自身控制，调用方无需再套一层信号量
+
+        Args:
+            requests: LLM请求列表
+            max_concurrency: 最大并发数
+
+        Returns:
+            与requests顺序一致的结果列表，单个请求失败时对应位置为异常对象
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(request: LLMRequest) -> LLMResponse:
+            async with semaphore:
+                return await self.chat(request)
+
+        return await asyncio.gather(
+            *[_one(request) for request in requests],
+            return_exceptions=True,
+        )
+
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -125,22 +154,43 @@ class BaseEmbeddingClient(ABC):
         response = await self.create_embedding(request)
         return response.data[0].embedding
 
-    async def embed_texts(self, texts: List[str], model: str) -> List[List[float]]:
+    async def embed_texts(
+        self,
+        texts: List[str],
+        model: str,
+        chunk_size: int = 1000,
+        max_concurrency: int = 8,
+    ) -> List[List[float]]:
         """
         便捷方法：为多个文本生成 embedding
 
+        文本按 chunk_size 切分为多个子批次并发请求，避免单次请求超出provider的
+        输入条数/token上限，同时让大批量写入的网络耗时并行化
+
         Args:
             texts: 文本列表
             model: 模型名称
+            chunk_size: 单次请求的最大文本数
+            max_concurrency: 最大并发请求数
 
         Returns:
-            Embedding 向量列表
+            与texts顺序一致的 Embedding 向量列表
         """
-        request = EmbeddingRequest(model=model, input=texts)
-        response = await self.create_embedding(request)
-        # 按 index 排序，确保顺序正确
-        sorted_data = sorted(response.data, key=lambda x: x.index)
-        return [item.embedding for item in sorted_data]
+        if not texts:
+            return []
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                response = await self.create_embedding(EmbeddingRequest(model=model, input=chunk))
+            # 按 index 排序，确保顺序正确
+            sorted_data = sorted(response.data, key=lambda x: x.index)
+            return [item.embedding for item in sorted_data]
+
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        results = await asyncio.gather(*[_one(chunk) for chunk in chunks])
+        return [embedding for part in results for embedding in part]
 
     @property
     @abstractmethod
@@ -0,0 +1,211 @@
+"""
+LLM响应缓存
+
+基于内容哈希的响应缓存：相同的请求参数（provider、model、system prompt、消息等）
+直接返回之前的LLMResponse，省去一次完整的网络调用
+"""
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+import structlog
+from redis.asyncio import Redis
+
+from .types import LLMResponse
+
+logger = structlog.get_logger(__name__)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    生成内容寻址的缓存键
+
+    每个字段先用orjson序列化为JSON字节（key排序，保证确定性），再加上8字节的长度前缀
+    拼接后计算sha256，避免 ("ab", "c") 与 ("a", "bc") 这类字段边界碰撞
+
+    Args:
+        *parts: 参与计算的字段（需可JSON序列化，无法序列化的按str处理）
+
+    Returns:
+        sha256十六进制字符串
+    """
+    hasher = hashlib.sha256()
+    for part in parts:
+        data = orjson.dumps(part, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        hasher.update(len(data).to_bytes(8, "big"))
+        hasher.update(data)
+    return hasher.hexdigest()
+
+
+class ResponseCache(ABC):
+    """响应缓存抽象基类"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _record(self, response: Optional[LLMResponse]) -> Optional[LLMResponse]:
+        """记录一次读取的命中情况"""
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[LLMResponse]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的响应，未命中返回None
+        """
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, response: LLMResponse) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            response: LLM响应
+        """
+        pass
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """清空缓存"""
+        pass
+
+
+class LRUResponseCache(ResponseCache):
+    """进程内LRU缓存"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        初始化LRU缓存
+
+        Args:
+            maxsize: 最大缓存条目数，超出后淘汰最久未使用的条目
+            ttl: 过期时间（秒），None表示不过期
+        """
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[LLMResponse, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[LLMResponse]:
+        entry = self._data.get(key)
+        if entry is None:
+            return self._record(None)
+
+        response, stored_at = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            return self._record(None)
+
+        self._data.move_to_end(key)
+        return self._record(response)
+
+    async def set(self, key: str, response: LLMResponse) -> None:
+        self._data[key] = (response, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisResponseCache(ResponseCache):
+    """Redis缓存（多进程/多实例共享）"""
+
+    def __init__(self, redis: Redis, prefix: str = "llm:response:", ttl: int = 3600):
+        """
+        初始化Redis缓存
+
+        Args:
+            redis: Redis客户端
+            prefix: 缓存键前缀
+            ttl: 过期时间（秒）
+        """
+        super().__init__()
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[LLMResponse]:
+        raw = await self.redis.get(f"{self.prefix}{key}")
+        if raw is None:
+            return self._record(None)
+        # 读取时重新校验，避免脏数据进入调用方
+        return self._record(LLMResponse.model_validate_json(raw))
+
+    async def set(self, key: str, response: LLMResponse) -> None:
+        await self.redis.setex(f"{self.prefix}{key}", self.ttl, response.model_dump_json())
+
+    async def clear(self) -> None:
+        async for key in self.redis.scan_iter(match=f"{self.prefix}*"):
+            await self.redis.delete(key)
+
+
+class TieredResponseCache(ResponseCache):
+    """
+    两级缓存：进程内缓存 + 共享缓存（如Redis）
+
+    先查进程内缓存，未命中再查共享缓存并回填进程内缓存；写入时两级都写，
+    多个worker进程因此可以复用彼此的结果。共享缓存出错时只记录日志，按未命中处理
+    """
+
+    def __init__(self, local: ResponseCache, shared: ResponseCache):
+        """
+        初始化两级缓存
+
+        Args:
+            local: 进程内缓存
+            shared: 共享缓存
+        """
+        super().__init__()
+        self.local = local
+        self.shared = shared
+
+    async def get(self, key: str) -> Optional[LLMResponse]:
+        response = await self.local.get(key)
+        if response is not None:
+            return self._record(response)
+
+        try:
+            response = await self.shared.get(key)
+        except Exception as e:
+            logger.warning("shared_response_cache_get_failed", error=str(e))
+            return self._record(None)
+
+        if response is not None:
+            await self.local.set(key, response)
+        return self._record(response)
+
+    async def set(self, key: str, response: LLMResponse) -> None:
+        await self.local.set(key, response)
+        try:
+            await self.shared.set(key, response)
+        except Exception as e:
+            logger.warning("shared_response_cache_set_failed", error=str(e))
+
+    async def clear(self) -> None:
+        await self.local.clear()
+        await self.shared.clear()
@@ -3,36 +3,125 @@ LLM工厂函数
 
 根据provider名称创建对应的LLM客户端
 """
-from typing import Optional, Dict
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Dict, Tuple
+import importlib
 import os
 import threading
 from app.core.config import settings
 from .base import BaseLLMClient, BaseEmbeddingClient
-from .providers import OpenAIClient, VolcengineClient
-from .providers.volcengine_embedding import VolcengineEmbeddingClient
 from .errors import LLMValidationError
 
 
-# provider名称到客户端类的映射
-PROVIDER_REGISTRY = {
-    "openai": OpenAIClient,
-    "volcengine": VolcengineClient,
-}
+# provider名称到客户端类的映射（"模块路径:类名"，首次使用时才导入对应的SDK）
+# 只读映射：防止运行期被意外修改
+PROVIDER_REGISTRY: Mapping[str, str] = MappingProxyType({
+    "openai": "app.ai.llm.providers.openai_client:OpenAIClient",
+    "openai-batch": "app.ai.llm.providers.openai_batch:OpenAIBatchClient",
+    "volcengine": "app.ai.llm.providers.volcengine_client:VolcengineClient",
+})
 
 # embedding provider名称到客户端类的映射
-EMBEDDING_PROVIDER_REGISTRY = {
-    "volcengine": VolcengineEmbeddingClient,
-}
+EMBEDDING_PROVIDER_REGISTRY: Mapping[str, str] = MappingProxyType({
+    "volcengine": "app.ai.llm.providers.volcengine_embedding:VolcengineEmbeddingClient",
+})
 
-# 全局缓存字典，用于存储已创建的客户端实例
-_LLM_CLIENT_CACHE: Dict[str, BaseLLMClient] = {}
+# 客户端缓存键：(provider, base_url, timeout, max_retries)，base_url为调用方传入的原始值
+ClientCacheKey = Tuple[str, Optional[str], float, int]
 
-# 全局缓存字典，用于存储已创建的embedding客户端实例
-_EMBEDDING_CLIENT_CACHE: Dict[str, BaseEmbeddingClient] = {}
 
-# 线程锁，确保缓存的线程安全
-_CACHE_LOCK = threading.Lock()
-_EMBEDDING_CACHE_LOCK = threading.Lock()
+class _ClientCache:
+    """
+    客户端缓存
+
+    读路径（命中）不加锁：CPython下单次dict读取是原子的。
+    客户端在锁外构造，并发未命中时可能重复构造，但只有先写入的实例被缓存并返回，
+    客户端构造本身没有副作用，多余的实例直接丢弃即可。
+    写入、清除在锁内进行，同时维护各provider的实例计数，统计信息无需遍历缓存。
+    缓存的客户端不做闲置淘汰：调用方（如LLMCaller）会长期持有客户端引用，
+    淘汰后再创建的实例会带着各自的并发限制器与旧实例同时工作
+    """
+
+    def __init__(self):
+        self._entries: Dict[ClientCacheKey, Any] = {}
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, key: ClientCacheKey) -> Optional[Any]:
+        """
+        读取缓存的客户端
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            客户端实例，未命中时返回None
+        """
+        return self._entries.get(key)
+
+    def put(self, key: ClientCacheKey, client: Any) -> Any:
+        """
+        写入客户端（已存在时保留先写入的实例）
+
+        Args:
+            key: 缓存键
+            client: 新建的客户端实例
+
+        Returns:
+            最终缓存的客户端实例
+        """
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                cached = client
+                self._entries[key] = client
+                self._counts[key[0]] += 1
+            return cached
+
+    def _remove(self, key: ClientCacheKey) -> None:
+        """删除缓存条目并更新计数（调用方需持有锁）"""
+        del self._entries[key]
+        provider = key[0]
+        self._counts[provider] -= 1
+        if self._counts[provider] <= 0:
+            del self._counts[provider]
+
+    def clear(self, provider: Optional[str] = None) -> None:
+        """
+        清除缓存
+
+        Args:
+            provider: 要清除的provider名称，如果为None则清除所有缓存
+        """
+        with self._lock:
+            if provider is None:
+                self._entries.clear()
+                self._counts.clear()
+                return
+            for key in [k for k in self._entries if k[0] == provider]:
+                self._remove(key)
+
+    def info(self) -> Dict[str, int]:
+        """
+        获取各provider的缓存数量
+
+        Returns:
+            provider名称到实例数量的字典
+        """
+        with self._lock:
+            return dict(self._counts)
+
+
+# 全局缓存，用于存储已创建的客户端实例
+_LLM_CLIENT_CACHE = _ClientCache()
+
+# 全局缓存，用于存储已创建的embedding客户端实例
+_EMBEDDING_CLIENT_CACHE = _ClientCache()
+
+# 已读取到的API密钥（环境变量名 -> 值），只缓存非空值，未配置时下次仍会重新读取
+_API_KEY_CACHE: Dict[str, str] = {}
 
 
 def get_llm(
@@ -45,7 +134,7 @@ def get_llm(
     获取LLM客户端
 
     Args:
-        provider: provider名称（openai, volcengine等）
+        provider: provider名称（openai, openai-batch, volcengine等）
         base_url: API base URL（可选，未传则从settings读取）
         timeout: 请求超时时间（秒）
         max_retries: 最大重试次数
@@ -66,20 +155,28 @@ def get_llm(
         ...     base_url="https://api.openai.com/v1"
         ... )
     """
-    # 检查provider是否支持
-    if provider not in PROVIDER_REGISTRY:
-        supported = ", ".join(PROVIDER_REGISTRY.keys())
+    # 缓存键直接使用调用参数（未传base_url时同一provider总是解析到同一配置），
+    # 命中时只需一次dict查找，无需重复校验、读取配置和环境变量
+    cache_key = (provider, base_url, timeout, max_retries)
+    client = _LLM_CLIENT_CACHE.get(cache_key)
+    if client is not None:
+        return client
+
+    # 检查provider是否支持（一次查找同时完成校验和取值）
+    class_path = PROVIDER_REGISTRY.get(provider)
+    if class_path is None:
+        supported = ", ".join(PROVIDER_REGISTRY)
         raise LLMValidationError(
             f"不支持的provider: {provider}，支持的provider: {supported}",
             field="provider",
         )
 
     # 如果没有显式传参，从settings读取
-    if base_url is None:
-        provider_config = _get_provider_config(provider)
-        base_url = provider_config.get("base_url")
+    provider_config = _get_provider_config(provider)
+    resolved_base_url = base_url if base_url is not None else provider_config.get("base_url")
 
-    api_key = os.getenv(f"{provider.upper()}_API_KEY")
+    # api_key_env 允许多个provider共用同一个密钥（如 openai-batch 复用 OPENAI_API_KEY）
+    api_key = _get_api_key(provider_config.get("api_key_env") or f"{provider.upper()}_API_KEY")
     # 验证api_key
     if not api_key:
         raise LLMValidationError(
@@ -87,31 +184,17 @@ def get_llm(
             field="api_key",
         )
 
-    # 生成缓存键，包含所有影响客户端行为的参数
-    cache_key = f"{provider}"  # 只使用API key后8位确保安全
-
-    # 先检查缓存，如果命中则直接返回（无需加锁）
-    if cache_key in _LLM_CLIENT_CACHE:
-        return _LLM_CLIENT_CACHE[cache_key]
-
-    # 缓存未命中，需要创建新实例，此时加锁
-    with _CACHE_LOCK:
-        # 双重检查：在获取锁后再次检查缓存，防止其他线程已经创建了实例
-        if cache_key in _LLM_CLIENT_CACHE:
-            return _LLM_CLIENT_CACHE[cache_key]
-
-        # 创建新客户端实例
-        client_class = PROVIDER_REGISTRY[provider]
-        client = client_class(
-            api_key=api_key,
-            base_url=base_url,
-            timeout=timeout,
-            max_retries=max_retries,
-        )
+    # 缓存未命中，创建新实例
+    client_class = _load_class(class_path)
+    client = client_class(
+        api_key=api_key,
+        base_url=resolved_base_url,
+        timeout=timeout,
+        max_retries=max_retries,
+    )
 
-        # 缓存客户端实例
-        _LLM_CLIENT_CACHE[cache_key] = client
-        return client
+    # 并发创建时以先写入缓存的实例为准
+    return _LLM_CLIENT_CACHE.put(cache_key, client)
 
 
 def get_embedding(
@@ -145,20 +228,28 @@ def get_embedding(
         ...     base_url="https://ark.cn-beijing.volces.com/api/v3"
         ... )
     """
-    # 检查provider是否支持
-    if provider not in EMBEDDING_PROVIDER_REGISTRY:
-        supported = ", ".join(EMBEDDING_PROVIDER_REGISTRY.keys())
+    # 缓存键直接使用调用参数，命中时只需一次dict查找
+    cache_key = (provider, base_url, timeout, max_retries)
+    client = _EMBEDDING_CLIENT_CACHE.get(cache_key)
+    if client is not None:
+        return client
+
+    # 检查provider是否支持（一次查找同时完成校验和取值）
+    class_path = EMBEDDING_PROVIDER_REGISTRY.get(provider)
+    if class_path is None:
+        supported = ", ".join(EMBEDDING_PROVIDER_REGISTRY)
         raise LLMValidationError(
             f"不支持的embedding provider: {provider}，支持的provider: {supported}",
             field="provider",
         )
 
     # 如果没有显式传参，从settings读取
-    if base_url is None:
+    resolved_base_url = base_url
+    if resolved_base_url is None:
         provider_config = _get_embedding_provider_config(provider)
-        base_url = provider_config.get("base_url")
+        resolved_base_url = provider_config.get("base_url")
 
-    api_key = os.getenv(f"{provider.upper()}_API_KEY")
+    api_key = _get_api_key(f"{provider.upper()}_API_KEY")
     # 验证api_key
     if not api_key:
         raise LLMValidationError(
@@ -166,31 +257,17 @@ def get_embedding(
             field="api_key",
         )
 
-    # 生成缓存键，包含所有影响客户端行为的参数
-    cache_key = f"{provider}"  # 只使用API key后8位确保安全
-
-    # 先检查缓存，如果命中则直接返回（无需加锁）
-    if cache_key in _EMBEDDING_CLIENT_CACHE:
-        return _EMBEDDING_CLIENT_CACHE[cache_key]
-
-    # 缓存未命中，需要创建新实例，此时加锁
-    with _EMBEDDING_CACHE_LOCK:
-        # 双重检查：在获取锁后再次检查缓存，防止其他线程已经创建了实例
-        if cache_key in _EMBEDDING_CLIENT_CACHE:
-            return _EMBEDDING_CLIENT_CACHE[cache_key]
-
-        # 创建新客户端实例
-        client_class = EMBEDDING_PROVIDER_REGISTRY[provider]
-        client = client_class(
-            api_key=api_key,
-            base_url=base_url,
-            timeout=timeout,
-            max_retries=max_retries,
-        )
+    # 缓存未命中，创建新实例
+    client_class = _load_class(class_path)
+    client = client_class(
+        api_key=api_key,
+        base_url=resolved_base_url,
+        timeout=timeout,
+        max_retries=max_retries,
+    )
 
-        # 缓存客户端实例
-        _EMBEDDING_CLIENT_CACHE[cache_key] = client
-        return client
+    # 并发创建时以先写入缓存的实例为准
+    return _EMBEDDING_CLIENT_CACHE.put(cache_key, client)
 
 
 def clear_cache(provider: Optional[str] = None) -> None:
@@ -200,14 +277,10 @@ def clear_cache(provider: Optional[str] = None) -> None:
     Args:
         provider: 要清除的provider名称，如果为None则清除所有缓存
     """
-    with _CACHE_LOCK:
-        if provider is None:
-            _LLM_CLIENT_CACHE.clear()
-        else:
-            # 清除特定provider的缓存
-            keys_to_remove = [k for k in _LLM_CLIENT_CACHE.keys() if k.startswith(f"{provider}")]
-            for key in keys_to_remove:
-                del _LLM_CLIENT_CACHE[key]
+    _LLM_CLIENT_CACHE.clear(provider)
+    if provider is None:
+        # 全部清除时同时丢弃已缓存的API密钥，便于轮换密钥后重新读取
+        _API_KEY_CACHE.clear()
 
 
 def clear_embedding_cache(provider: Optional[str] = None) -> None:
@@ -217,14 +290,7 @@ def clear_embedding_cache(provider: Optional[str] = None) -> None:
     Args:
         provider: 要清除的provider名称，如果为None则清除所有缓存
     """
-    with _EMBEDDING_CACHE_LOCK:
-        if provider is None:
-            _EMBEDDING_CLIENT_CACHE.clear()
-        else:
-            # 清除特定provider的缓存
-            keys_to_remove = [k for k in _EMBEDDING_CLIENT_CACHE.keys() if k.startswith(f"{provider}:")]
-            for key in keys_to_remove:
-                del _EMBEDDING_CLIENT_CACHE[key]
+    _EMBEDDING_CLIENT_CACHE.clear(provider)
 
 
 def get_cache_info() -> Dict[str, int]:
@@ -234,12 +300,7 @@ def get_cache_info() -> Dict[str, int]:
     Returns:
         包含各provider缓存数量的字典
     """
-    with _CACHE_LOCK:
-        cache_info = {}
-        for key in _LLM_CLIENT_CACHE.keys():
-            provider = key  # 缓存键就是provider名称
-            cache_info[provider] = cache_info.get(provider, 0) + 1
-        return cache_info
+    return _LLM_CLIENT_CACHE.info()
 
 
 def get_embedding_cache_info() -> Dict[str, int]:
@@ -249,12 +310,52 @@ def get_embedding_cache_info() -> Dict[str, int]:
     Returns:
         包含各provider缓存数量的字典
     """
-    with _EMBEDDING_CACHE_LOCK:
-        cache_info = {}
-        for key in _EMBEDDING_CLIENT_CACHE.keys():
-            provider = key  # 缓存键就是provider名称
-            cache_info[provider] = cache_info.get(provider, 0) + 1
-        return cache_info
+    return _EMBEDDING_CLIENT_CACHE.info()
+
+
+@lru_cache(maxsize=None)
+def _load_class(path: str) -> type:
+    """
+    按 "模块路径:类名" 导入客户端类（结果缓存）
+
+    Args:
+        path: 类路径，如 "app.ai.llm.providers.openai_client:OpenAIClient"
+
+    Returns:
+        客户端类
+    """
+    module_path, class_name = path.rsplit(":", 1)
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+def _get_api_key(env_name: str) -> Optional[str]:
+    """
+    读取API密钥（环境变量），读取到后缓存
+
+    Args:
+        env_name: 环境变量名
+
+    Returns:
+        API密钥，未配置时返回None
+    """
+    api_key = _API_KEY_CACHE.get(env_name)
+    if api_key is None:
+        api_key = os.getenv(env_name)
+        if api_key:
+            _API_KEY_CACHE[env_name] = api_key
+    return api_key
+
+
+@lru_cache(maxsize=None)
+def _provider_config_index() -> Dict[str, dict]:
+    """settings.AI_PROVIDERS 按provider名称建立的索引（首次使用时构建）"""
+    return {config.get("provider"): config for config in settings.AI_PROVIDERS}
+
+
+@lru_cache(maxsize=None)
+def _embedding_provider_config_index() -> Dict[str, dict]:
+    """settings.EMBEDDING_PROVIDERS 按provider名称建立的索引（首次使用时构建）"""
+    return {config.get("provider"): config for config in settings.EMBEDDING_PROVIDERS}
 
 
 def _get_provider_config(provider: str) -> dict:
@@ -270,9 +371,9 @@ def _get_provider_config(provider: str) -> dict:
     Raises:
         LLMValidationError: 配置不存在
     """
-    for provider_config in settings.AI_PROVIDERS:
-        if provider_config.get("provider") == provider:
-            return provider_config
+    provider_config = _provider_config_index().get(provider)
+    if provider_config is not None:
+        return provider_config
 
     raise LLMValidationError(
         f"未在配置中找到provider '{provider}'，请在settings.AI_PROVIDERS中添加配置",
@@ -293,9 +394,9 @@ def _get_embedding_provider_config(provider: str) -> dict:
     Raises:
         LLMValidationError: 配置不存在
     """
-    for provider_config in settings.EMBEDDING_PROVIDERS:
-        if provider_config.get("provider") == provider:
-            return provider_config
+    provider_config = _embedding_provider_config_index().get(provider)
+    if provider_config is not None:
+        return provider_config
 
     raise LLMValidationError(
         f"未在配置中找到embedding provider '{provider}'，请在settings.EMBEDDING_PROVIDERS中添加配置",
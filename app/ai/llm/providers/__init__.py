@@ -1,8 +1,26 @@
 """
 LLM Providers
+
+客户端类在首次访问时才导入，只用到部分provider时不必加载其余SDK
 """
-from .openai_client import OpenAIClient
-from .volcengine_client import VolcengineClient
-from .volcengine_embedding import VolcengineEmbeddingClient
+import importlib
+from typing import Any
+
+# 导出名称到所在子模块的映射
+_LAZY_IMPORTS = {
+    "OpenAIClient": ".openai_client",
+    "OpenAIBatchClient": ".openai_batch",
+    "VolcengineClient": ".volcengine_client",
+    "VolcengineEmbeddingClient": ".volcengine_embedding",
+}
+
+__all__ = ["OpenAIClient", "OpenAIBatchClient", "VolcengineClient", "VolcengineEmbeddingClient"]
+
 
-__all__ = ["OpenAIClient", "VolcengineClient", "VolcengineEmbeddingClient"]
+def __getattr__(name: str) -> Any:
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
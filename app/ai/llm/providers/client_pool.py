@@ -0,0 +1,59 @@
+"""
+共享HTTP连接池
+
+所有兼容OpenAI格式的对话客户端共用一个httpx.AsyncClient，
+复用TCP/TLS连接与DNS解析结果（安装了h2时启用HTTP/2多路复用），
+避免每个AsyncOpenAI实例各自维护一套连接池
+
+连接池大小通过 LLM_HTTP_MAX_CONNECTIONS / LLM_HTTP_MAX_KEEPALIVE /
+LLM_HTTP_KEEPALIVE_EXPIRY 按部署调整；建立连接失败（请求尚未发出）时由传输层
+按 LLM_HTTP_CONNECT_RETRIES 直接重试，不进入上层的退避重试
+
+注意：httpx连接绑定创建它的事件循环，在独立线程/事件循环中使用的客户端
+（如embedding后台任务）不应共享此连接池
+"""
+import importlib.util
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+from .rate_limit import record_rate_limit
+
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取共享的httpx客户端（首次调用或已关闭时创建）
+
+    Returns:
+        httpx.AsyncClient实例
+    """
+    global _HTTP_CLIENT
+
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            retries=settings.LLM_HTTP_CONNECT_RETRIES,
+        )
+        _HTTP_CLIENT = httpx.AsyncClient(
+            transport=transport,
+            # 从响应头记录provider剩余额度，额度用尽时后续请求在本地等待
+            event_hooks={"response": [record_rate_limit]},
+        )
+    return _HTTP_CLIENT
+
+
+async def close_http_client() -> None:
+    """关闭共享的httpx客户端（应用退出时调用）"""
+    global _HTTP_CLIENT
+
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
@@ -0,0 +1,206 @@
+"""
+OpenAI Batch API Provider
+
+用于对延迟不敏感的批量任务（简历分析、候选人批量评估等）：
+请求以JSONL文件上传后异步执行，费用约为实时接口的一半，且没有逐个请求的HTTP开销
+
+实时接口（chat/stream_chat）继承自OpenAIClient，仍然可用
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import orjson
+from openai.types.chat import ChatCompletion
+
+from .openai_client import OpenAIClient
+from ..types import LLMRequest, LLMResponse
+from ..errors import LLMAPIError
+
+# Batch API 支持的完成窗口（目前只有24h）
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# 终态：不会再变化的batch状态
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class OpenAIBatchClient(OpenAIClient):
+    """OpenAI Batch API客户端"""
+
+    @property
+    def provider_name(self) -> str:
+        return "openai-batch"
+
+    def _build_batch_line(self, custom_id: str, request: LLMRequest) -> bytes:
+        """
+        构建单条JSONL请求
+
+        Args:
+            custom_id: 请求标识（用于回填结果顺序）
+            request: LLM请求
+
+        Returns:
+            JSONL中的一行
+        """
+        body = self._build_request_params(request)
+        body["stream"] = False
+        return orjson.dumps(
+            {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+        )
+
+    async def submit(
+        self,
+        requests: List[LLMRequest],
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """
+        提交批量请求
+
+        Args:
+            requests: LLM请求列表（custom_id为请求在列表中的下标）
+            metadata: batch元数据（可选，便于在控制台中检索）
+
+        Returns:
+            batch_id
+        """
+        try:
+            content = b"\n".join(
+                self._build_batch_line(str(index), request)
+                for index, request in enumerate(requests)
+            )
+            input_file = await self.client.files.create(
+                file=("batch_input.jsonl", content),
+                purpose="batch",
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint=BATCH_ENDPOINT,
+                completion_window=BATCH_COMPLETION_WINDOW,
+                metadata=metadata,
+            )
+            return batch.id
+        except Exception as e:
+            raise self._convert_error(e)
+
+    async def poll(self, batch_id: str) -> str:
+        """
+        查询batch状态
+
+        Args:
+            batch_id: batch ID
+
+        Returns:
+            batch状态（validating, in_progress, finalizing, completed, failed, expired, cancelled等）
+        """
+        try:
+            batch = await self.client.batches.retrieve(batch_id)
+            return batch.status
+        except Exception as e:
+            raise self._convert_error(e)
+
+    async def fetch(self, batch_id: str) -> List[Optional[LLMResponse]]:
+        """
+        获取batch结果
+
+        Args:
+            batch_id: batch ID（必须已完成）
+
+        Returns:
+            与提交时顺序一致的响应列表，单个请求失败时对应位置为None
+
+        Raises:
+            LLMAPIError: batch未完成
+        """
+        try:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status != "completed":
+                raise LLMAPIError(
+                    message=f"batch {batch_id} 尚未完成，当前状态: {batch.status}",
+                    provider=self.provider_name,
+                )
+
+            results: List[Optional[LLMResponse]] = [None] * batch.request_counts.total
+            if not batch.output_file_id:
+                return results
+
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.content.splitlines():
+                if not line:
+                    continue
+                item = orjson.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                results[int(item["custom_id"])] = self._parse_completion(response["body"])
+            return results
+        except LLMAPIError:
+            raise
+        except Exception as e:
+            raise self._convert_error(e)
+
+    async def wait(
+        self,
+        batch_id: str,
+        poll_interval: float = 30.0,
+        max_poll_interval: float = 600.0,
+    ) -> str:
+        """
+        轮询直到batch进入终态
+
+        batch通常需要数分钟到数小时，轮询间隔逐次增大（每次1.5倍，不超过max_poll_interval），
+        避免长时间任务产生大量无效查询
+
+        Args:
+            batch_id: batch ID
+            poll_interval: 初始轮询间隔（秒）
+            max_poll_interval: 最大轮询间隔（秒）
+
+        Returns:
+            终态状态
+        """
+        while True:
+            status = await self.poll(batch_id)
+            if status in BATCH_TERMINAL_STATUSES:
+                return status
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 1.5, max_poll_interval)
+
+    async def run(
+        self,
+        requests: List[LLMRequest],
+        metadata: Optional[Dict[str, str]] = None,
+        poll_interval: float = 30.0,
+    ) -> List[Optional[LLMResponse]]:
+        """
+        提交批量请求并等待结果（适用于可以接受较长延迟的后台任务）
+
+        Args:
+            requests: LLM请求列表
+            metadata: batch元数据（可选）
+            poll_interval: 初始轮询间隔（秒）
+
+        Returns:
+            与requests顺序一致的响应列表，单个请求失败时对应位置为None
+
+        Raises:
+            LLMAPIError: batch未成功完成（failed、expired、cancelled）
+        """
+        batch_id = await self.submit(requests, metadata=metadata)
+        status = await self.wait(batch_id, poll_interval=poll_interval)
+        if status != "completed":
+            raise LLMAPIError(
+                message=f"batch {batch_id} 未成功完成，状态: {status}",
+                provider=self.provider_name,
+            )
+        return await self.fetch(batch_id)
+
+    def _parse_completion(self, body: Dict[str, Any]) -> LLMResponse:
+        """解析batch输出中的chat completion"""
+        completion = ChatCompletion.model_validate(body)
+        choice = completion.choices[0]
+        return LLMResponse(
+            message=self._parse_message(choice),
+            usage=self._parse_usage(completion.usage),
+            finish_reason=choice.finish_reason,
+            model=completion.model,
+        )
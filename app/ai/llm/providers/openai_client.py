@@ -3,10 +3,16 @@ OpenAI Provider
 
 支持OpenAI官方API和兼容OpenAI格式的其他厂商
 """
-import asyncio
-from typing import AsyncIterator, Any, Dict, List
-from openai import AsyncOpenAI, APIError, APITimeoutError, RateLimitError, AuthenticationError
-
+from typing import AsyncIterator, Any, Dict, List, Optional
+import httpx
+import structlog
+from pydantic import ConfigDict
+from openai import AsyncOpenAI, RateLimitError
+
+from app.core.config import settings
+from .client_pool import get_http_client
+from .rate_limit import AdaptiveConcurrencyLimiter, wait_for_rate_limit
+from .retry import RetryMixin
 from ..base import BaseLLMClient
 from ..types import (
     LLMRequest,
@@ -27,16 +33,31 @@ from ..types import (
     # 音频输出
     AudioOutput,
 )
-from ..errors import (
-    LLMError,
-    LLMAPIError,
-    LLMTimeoutError,
-    LLMRateLimitError,
-    LLMAuthenticationError,
+
+logger = structlog.get_logger(__name__)
+
+# 值不为None时原样透传的可选请求参数
+_OPTIONAL_PARAMS = (
+    "max_completion_tokens",
+    "top_p",
+    "frequency_penalty",
+    "presence_penalty",
+    "stop",
+    "tools",
+    "tool_choice",
 )
 
 
-class OpenAIClient(BaseLLMClient):
+class _FrozenAssistantOutputMessage(AssistantOutputMessage):
+    """只读的 AssistantOutputMessage，用于在多个流式块之间共享"""
+    model_config = ConfigDict(frozen=True)
+
+
+# 空增量消息：流式响应中没有任何内容的块共享同一个只读实例，避免每块一次分配
+_EMPTY_DELTA = _FrozenAssistantOutputMessage()
+
+
+class OpenAIClient(RetryMixin, BaseLLMClient):
     """OpenAI客户端"""
 
     def __init__(
@@ -45,19 +66,55 @@ class OpenAIClient(BaseLLMClient):
         base_url: str | None = None,
         timeout: float = 60.0,
         max_retries: int = 3,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_concurrent_requests: Optional[int] = None,
     ):
+        """
+        初始化OpenAI客户端
+
+        Args:
+            api_key: API密钥
+            base_url: API base URL（可选）
+            timeout: 请求超时时间（秒），建立连接超时单独按 LLM_HTTP_CONNECT_TIMEOUT
+            max_retries: 最大重试次数
+            http_client: httpx客户端（可选，默认使用进程内共享的连接池）
+            max_concurrent_requests: 同时发出的最大请求数（可选，默认读取settings）
+        """
         super().__init__(api_key, base_url, timeout, max_retries)
+        # 工厂按配置缓存客户端，同一provider配置的所有调用共用这一个并发额度
+        self._concurrency = AdaptiveConcurrencyLimiter(
+            max_concurrent_requests or settings.LLM_MAX_CONCURRENT_REQUESTS
+        )
         self.client = AsyncOpenAI(
             api_key=api_key,
             base_url=base_url,
-            timeout=timeout,
+            timeout=httpx.Timeout(timeout, connect=settings.LLM_HTTP_CONNECT_TIMEOUT),
             max_retries=0,  # 手动控制重试
+            http_client=http_client or get_http_client(),
         )
+        self._host = self.client.base_url.host
 
     @property
     def provider_name(self) -> str:
         return "openai"
 
+    async def _limited_call(self, func, *args, **kwargs):
+        """
+        在并发额度内发出一次请求
+
+        只包住单次请求（流式请求为建立连接、收到响应头之前），重试的退避等待不占用额度；
+        provider返回的剩余额度已用尽时，先在本地等待到额度重置；收到429时收紧并发额度
+        """
+        await wait_for_rate_limit(self._host)
+        async with self._concurrency:
+            try:
+                result = await func(*args, **kwargs)
+            except RateLimitError:
+                self._concurrency.on_rate_limited()
+                raise
+        self._concurrency.on_success()
+        return result
+
     def _build_messages(self, request: LLMRequest) -> List[Dict[str, Any]]:
         """
         构建消息列表，自动处理 system prompt
@@ -68,37 +125,55 @@ class OpenAIClient(BaseLLMClient):
         Returns:
             消息列表
         """
-        messages = []
+        to_dict = self._message_to_dict
 
-        # 如果有 system 参数，插入到最前面
+        # 如果有 system 参数，放在最前面（一次构建完整列表，避免逐条append扩容）
         if request.system:
-            messages.append({"role": "system", "content": request.system})
-
-        # 添加对话消息
-        for msg in request.messages:
-            # 先获取基础字段
-            msg_dict = msg.model_dump(exclude_none=True)
-
-            # 特殊处理 content 数组（如果包含对象，需要序列化）
-            if hasattr(msg, "content") and isinstance(msg.content, list):
-                msg_dict["content"] = [
-                    part if isinstance(part, str) else part.model_dump(exclude_none=True)
-                    for part in msg.content
-                ]
+            return [{"role": "system", "content": request.system}, *map(to_dict, request.messages)]
+        return [to_dict(msg) for msg in request.messages]
 
-            # 特殊处理 tool_calls（确保序列化）
-            if hasattr(msg, "tool_calls") and msg.tool_calls:
-                msg_dict["tool_calls"] = [
-                    tc.model_dump(exclude_none=True) for tc in msg.tool_calls
-                ]
-
-            # 特殊处理 audio（确保格式正确）
-            if hasattr(msg, "audio") and msg.audio:
-                msg_dict["audio"] = msg.audio.model_dump(exclude_none=True)
+    @staticmethod
+    def _message_to_dict(msg: Any) -> Dict[str, Any]:
+        """
+        把单条消息转换为请求体中的字典
 
-            messages.append(msg_dict)
+        Args:
+            msg: 对话消息
 
-        return messages
+        Returns:
+            消息字典
+        """
+        # 常见情况：纯文本消息且没有其他字段，直接构造，跳过model_dump
+        fields = msg.__dict__
+        if isinstance(fields.get("content"), str) and all(
+            value is None for key, value in fields.items() if key not in ("role", "content")
+        ):
+            return {"role": msg.role, "content": msg.content}
+
+        # 先获取基础字段
+        msg_dict = msg.model_dump(exclude_none=True)
+
+        # 特殊处理 content 数组（如果包含对象，需要序列化）
+        content = fields.get("content")
+        if isinstance(content, list):
+            msg_dict["content"] = [
+                part if isinstance(part, str) else part.model_dump(exclude_none=True)
+                for part in content
+            ]
+
+        # 特殊处理 tool_calls（确保序列化）
+        tool_calls = fields.get("tool_calls")
+        if tool_calls:
+            msg_dict["tool_calls"] = [
+                tc.model_dump(exclude_none=True) for tc in tool_calls
+            ]
+
+        # 特殊处理 audio（确保格式正确）
+        audio = fields.get("audio")
+        if audio:
+            msg_dict["audio"] = audio.model_dump(exclude_none=True)
+
+        return msg_dict
 
     def _build_request_params(self, request: LLMRequest) -> Dict[str, Any]:
         """构建请求参数"""
@@ -114,20 +189,8 @@ class OpenAIClient(BaseLLMClient):
             params["temperature"] = request.temperature
 
         # 可选参数
-        if request.max_completion_tokens is not None:
-            params["max_completion_tokens"] = request.max_completion_tokens
-        if request.top_p is not None:
-            params["top_p"] = request.top_p
-        if request.frequency_penalty is not None:
-            params["frequency_penalty"] = request.frequency_penalty
-        if request.presence_penalty is not None:
-            params["presence_penalty"] = request.presence_penalty
-        if request.stop is not None:
-            params["stop"] = request.stop
-        if request.tools is not None:
-            params["tools"] = request.tools
-        if request.tool_choice is not None:
-            params["tool_choice"] = request.tool_choice
+        fields = request.__dict__
+        params.update({name: fields[name] for name in _OPTIONAL_PARAMS if fields[name] is not None})
         
         # # 推理模型参数（如 o1 系列）
         # if request.reasoning_effort is not None:
@@ -145,26 +208,30 @@ class OpenAIClient(BaseLLMClient):
         message = AssistantOutputMessage(role="assistant")
 
         # content
-        if hasattr(msg, "content") and msg.content is not None:
-            message.content = msg.content
+        content = getattr(msg, "content", None)
+        if content is not None:
+            message.content = content
 
         # refusal
-        if hasattr(msg, "refusal") and msg.refusal is not None:
-            message.refusal = msg.refusal
+        refusal = getattr(msg, "refusal", None)
+        if refusal is not None:
+            message.refusal = refusal
 
         # audio (完整的音频数据)
-        if hasattr(msg, "audio") and msg.audio is not None:
+        audio = getattr(msg, "audio", None)
+        if audio is not None:
             message.audio = AudioOutput(
-                data=msg.audio.data,
-                expires_at=msg.audio.expires_at,
-                id=msg.audio.id,
-                transcript=msg.audio.transcript,
+                data=audio.data,
+                expires_at=audio.expires_at,
+                id=audio.id,
+                transcript=audio.transcript,
             )
 
         # tool_calls
-        if hasattr(msg, "tool_calls") and msg.tool_calls:
+        tool_calls = getattr(msg, "tool_calls", None)
+        if tool_calls:
             parsed_calls = []
-            for tc in msg.tool_calls:
+            for tc in tool_calls:
                 if tc.type == "function":
                     parsed_calls.append(
                         FunctionToolCall(
@@ -190,8 +257,9 @@ class OpenAIClient(BaseLLMClient):
             message.tool_calls = parsed_calls
 
         # reasoning_content (o1等推理模型)
-        if hasattr(msg, "reasoning_content") and msg.reasoning_content is not None:
-            message.reasoning_content = msg.reasoning_content
+        reasoning_content = getattr(msg, "reasoning_content", None)
+        if reasoning_content is not None:
+            message.reasoning_content = reasoning_content
 
         return message
 
@@ -204,71 +272,6 @@ class OpenAIClient(BaseLLMClient):
             reasoning_tokens=getattr(usage, "reasoning_tokens", None),
         )
 
-    async def _retry_with_backoff(self, func, *args, **kwargs):
-        """指数退避重试"""
-        last_error = None
-        for attempt in range(self.max_retries):
-            try:
-                return await func(*args, **kwargs)
-            except (APITimeoutError, RateLimitError, APIError) as e:
-                last_error = e
-                # 5xx错误或超时、限流才重试
-                if isinstance(e, RateLimitError) or isinstance(e, APITimeoutError):
-                    if attempt < self.max_retries - 1:
-                        wait_time = 2 ** attempt  # 1s, 2s, 4s
-                        await asyncio.sleep(wait_time)
-                        continue
-                elif isinstance(e, APIError):
-                    # 5xx错误重试
-                    if hasattr(e, "status_code") and 500 <= e.status_code < 600:
-                        if attempt < self.max_retries - 1:
-                            wait_time = 2 ** attempt
-                            await asyncio.sleep(wait_time)
-                            continue
-                raise
-            except Exception as e:
-                # 其他错误不重试
-                raise
-
-        # 重试耗尽，抛出最后一个错误
-        raise last_error
-
-    def _convert_error(self, error: Exception) -> LLMError:
-        """转换错误为统一格式"""
-        if isinstance(error, AuthenticationError):
-            return LLMAuthenticationError(
-                message=str(error),
-                provider=self.provider_name,
-                original_error=error,
-            )
-        elif isinstance(error, RateLimitError):
-            return LLMRateLimitError(
-                message=str(error),
-                provider=self.provider_name,
-                original_error=error,
-            )
-        elif isinstance(error, APITimeoutError):
-            return LLMTimeoutError(
-                message=str(error),
-                timeout=self.timeout,
-                provider=self.provider_name,
-                original_error=error,
-            )
-        elif isinstance(error, APIError):
-            status_code = getattr(error, "status_code", None)
-            return LLMAPIError(
-                message=str(error),
-                status_code=status_code,
-                provider=self.provider_name,
-                original_error=error,
-            )
-        else:
-            return LLMError(
-                message=str(error),
-                provider=self.provider_name,
-                original_error=error,
-            )
-
     async def chat(self, request: LLMRequest) -> LLMResponse:
         """非流式对话"""
         try:
@@ -277,6 +280,7 @@ class OpenAIClient(BaseLLMClient):
 
             # 带重试的请求
             response = await self._retry_with_backoff(
+                self._limited_call,
                 self.client.chat.completions.create,
                 **params,
             )
@@ -303,74 +307,95 @@ class OpenAIClient(BaseLLMClient):
 
             # 带重试的请求
             stream = await self._retry_with_backoff(
+                self._limited_call,
                 self.client.chat.completions.create,
                 **params,
             )
 
-            async for chunk in stream:
-                if not chunk.choices:
-                    # 最后一个chunk可能没有choices，只有usage
-                    if hasattr(chunk, "usage") and chunk.usage:
-                        yield StreamChunk(
-                            delta=AssistantOutputMessage(role="assistant"),
-                            usage=self._parse_usage(chunk.usage),
-                            model=chunk.model,
-                        )
-                    continue
-
-                choice = chunk.choices[0]
-                delta = choice.delta
-
-                # 构建 delta message
-                delta_msg = AssistantOutputMessage(role="assistant")
-
-                if hasattr(delta, "content") and delta.content is not None:
-                    delta_msg.content = delta.content
-
-                if hasattr(delta, "refusal") and delta.refusal is not None:
-                    delta_msg.refusal = delta.refusal
+            parse_usage = self._parse_usage
+            completed = False
+            try:
+                async for chunk in stream:
+                    # getattr带默认值：每个chunk只做一次属性查找（hasattr失败时会额外构造异常）
+                    chunk_usage = getattr(chunk, "usage", None)
+                    if not chunk.choices:
+                        # 最后一个chunk可能没有choices，只有usage
+                        if chunk_usage:
+                            yield StreamChunk(
+                                delta=_EMPTY_DELTA,
+                                usage=parse_usage(chunk_usage),
+                                model=chunk.model,
+                            )
+                        continue
 
-                if hasattr(delta, "audio") and delta.audio is not None:
-                    # 流式响应中的 audio 可能是增量数据
-                    delta_msg.audio = AudioOutput(
-                        data=delta.audio.data if hasattr(delta.audio, "data") else "",
-                        expires_at=delta.audio.expires_at if hasattr(delta.audio, "expires_at") else 0,
-                        id=delta.audio.id if hasattr(delta.audio, "id") else "",
-                        transcript=delta.audio.transcript if hasattr(delta.audio, "transcript") else "",
-                    )
+                    choice = chunk.choices[0]
+                    delta = choice.delta
+
+                    content = getattr(delta, "content", None)
+                    refusal = getattr(delta, "refusal", None)
+                    reasoning_content = getattr(delta, "reasoning_content", None)
+
+                    audio_output = None
+                    audio = getattr(delta, "audio", None)
+                    if audio is not None:
+                        # 流式响应中的 audio 可能是增量数据
+                        audio_output = AudioOutput(
+                            data=getattr(audio, "data", None) or "",
+                            expires_at=getattr(audio, "expires_at", None) or 0,
+                            id=getattr(audio, "id", None) or "",
+                            transcript=getattr(audio, "transcript", None) or "",
+                        )
 
-                if hasattr(delta, "tool_calls") and delta.tool_calls:
                     parsed_delta_calls = []
-                    for tc in delta.tool_calls:
-                        tc_type = tc.type if hasattr(tc, "type") else "function"
-                        if tc_type == "function":
-                            func_call = FunctionCall(
-                                name=tc.function.name if hasattr(tc.function, "name") else "",
-                                arguments=tc.function.arguments if hasattr(tc.function, "arguments") else "",
-                            )
+                    tool_calls = getattr(delta, "tool_calls", None)
+                    if tool_calls:
+                        for tc in tool_calls:
+                            if (getattr(tc, "type", None) or "function") != "function":
+                                continue
+                            function = getattr(tc, "function", None)
                             parsed_delta_calls.append(
                                 FunctionToolCall(
-                                    id=tc.id if hasattr(tc, "id") else "",
+                                    id=getattr(tc, "id", None) or "",
                                     type="function",
-                                    function=func_call,
+                                    function=FunctionCall(
+                                        name=getattr(function, "name", None) or "",
+                                        arguments=getattr(function, "arguments", None) or "",
+                                    ),
                                 )
                             )
-                    delta_msg.tool_calls = parsed_delta_calls if parsed_delta_calls else None
 
-                if hasattr(delta, "reasoning_content") and delta.reasoning_content is not None:
-                    delta_msg.reasoning_content = delta.reasoning_content
-
-                # usage 在最后的 chunk 中
-                usage = None
-                if hasattr(chunk, "usage") and chunk.usage:
-                    usage = self._parse_usage(chunk.usage)
+                    # 构建 delta message（空增量如首个role块、结束块复用只读的空消息）
+                    if (
+                        content is None
+                        and refusal is None
+                        and reasoning_content is None
+                        and audio_output is None
+                        and not parsed_delta_calls
+                    ):
+                        delta_msg = _EMPTY_DELTA
+                    else:
+                        delta_msg = AssistantOutputMessage(
+                            role="assistant",
+                            content=content,
+                            refusal=refusal,
+                            audio=audio_output,
+                            tool_calls=parsed_delta_calls or None,
+                            reasoning_content=reasoning_content,
+                        )
 
-                yield StreamChunk(
-                    delta=delta_msg,
-                    finish_reason=choice.finish_reason,
-                    usage=usage,
-                    model=chunk.model,
-                )
+                    yield StreamChunk(
+                        delta=delta_msg,
+                        finish_reason=choice.finish_reason,
+                        # usage 在最后的 chunk 中
+                        usage=parse_usage(chunk_usage) if chunk_usage else None,
+                        model=chunk.model,
+                    )
 
+                completed = True
+            finally:
+                # 调用方提前结束（客户端断开、任务取消）时立即关闭上游响应，把连接归还连接池
+                if not completed:
+                    logger.info("llm_stream_aborted", provider=self.provider_name, model=request.model)
+                await stream.close()
         except Exception as e:
             raise self._convert_error(e)
@@ -0,0 +1,158 @@
+"""
+Provider限流状态
+
+从响应头 x-ratelimit-remaining-* / x-ratelimit-reset-* 中读取剩余额度：
+额度用尽时记录该host恢复请求的时间，之后的请求在本地等待到重置时间再发出，
+而不是先发出去、收到429后再退避重试
+
+不返回这些响应头的provider由 AdaptiveConcurrencyLimiter 兜底：
+收到429时并发上限减半，之后随成功请求逐步恢复
+"""
+import asyncio
+import re
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+
+import httpx
+
+# 重置时间格式：纯数字（秒）或 "1s" / "6m0s" / "20ms" 这类时长
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# 并发上限减半后，至少经过这段时间（秒）才开始恢复
+CONCURRENCY_RECOVERY_DELAY = 5.0
+
+# host -> 可以恢复请求的时间（time.monotonic）
+_RESUME_AT: Dict[str, float] = {}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    解析 x-ratelimit-reset-* 响应头
+
+    Args:
+        value: 响应头的值
+
+    Returns:
+        距离额度重置的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _UNIT_SECONDS[unit] for number, unit in parts)
+
+
+async def record_rate_limit(response: httpx.Response) -> None:
+    """
+    httpx响应钩子：请求数或token额度用尽时，记录该host恢复请求的时间
+
+    Args:
+        response: httpx响应（流式响应在收到响应头时即触发）
+    """
+    headers = response.headers
+    delay = 0.0
+    for kind in ("requests", "tokens"):
+        try:
+            remaining = int(headers.get(f"x-ratelimit-remaining-{kind}"))
+        except (TypeError, ValueError):
+            continue
+        if remaining <= 0:
+            delay = max(delay, parse_reset(headers.get(f"x-ratelimit-reset-{kind}")) or 0.0)
+
+    if delay > 0:
+        host = response.request.url.host
+        _RESUME_AT[host] = max(_RESUME_AT.get(host, 0.0), time.monotonic() + delay)
+
+
+async def wait_for_rate_limit(host: Optional[str]) -> None:
+    """
+    该host的额度用尽时等待到重置时间
+
+    Args:
+        host: 请求的目标host
+    """
+    resume_at = _RESUME_AT.get(host)
+    if resume_at is None:
+        return
+    delay = resume_at - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    elif _RESUME_AT.get(host) == resume_at:
+        del _RESUME_AT[host]
+
+
+class _LoopSlots:
+    """单个事件循环内的并发计数"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    自适应并发上限（AIMD）
+
+    收到限流时上限减半；距上次减半超过 CONCURRENCY_RECOVERY_DELAY 后，
+    每个成功请求把上限加一，直到恢复到最大值。
+
+    asyncio.Condition 绑定首次使用它的事件循环，而客户端实例会被缓存并在多个事件循环中使用
+    （如工作线程中运行的批量任务），因此等待条件和在途请求数按事件循环分别维护，
+    并发上限在各事件循环间共享
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        """
+        Args:
+            max_limit: 最大并发数
+            min_limit: 限流时并发数下限
+        """
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = max_limit
+        self._decreased_at = 0.0
+        # 事件循环 -> 该循环内的并发计数（事件循环关闭回收后自动移除）
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopSlots]" = weakref.WeakKeyDictionary()
+        self._slots_lock = threading.Lock()
+
+    def _loop_slots(self) -> _LoopSlots:
+        """获取当前事件循环的并发计数，首次使用时创建"""
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            with self._slots_lock:
+                slots = self._slots.get(loop)
+                if slots is None:
+                    slots = self._slots[loop] = _LoopSlots()
+        return slots
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        slots = self._loop_slots()
+        async with slots.condition:
+            await slots.condition.wait_for(lambda: slots.in_flight < self.limit)
+            slots.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        slots = self._loop_slots()
+        async with slots.condition:
+            slots.in_flight -= 1
+            slots.condition.notify()
+
+    def on_rate_limited(self) -> None:
+        """收到限流响应：并发上限减半"""
+        self.limit = max(self.min_limit, self.limit // 2)
+        self._decreased_at = time.monotonic()
+
+    def on_success(self) -> None:
+        """请求成功：冷却期过后逐步恢复并发上限"""
+        if self.limit < self.max_limit and time.monotonic() - self._decreased_at >= CONCURRENCY_RECOVERY_DELAY:
+            self.limit += 1
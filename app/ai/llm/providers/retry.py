@@ -0,0 +1,112 @@
+"""
+重试与异常转换
+
+兼容OpenAI格式的客户端（对话、embedding）共用同一套重试与异常转换逻辑
+"""
+import asyncio
+import random
+from typing import Any, Dict, Optional
+
+from openai import (
+    APIError,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    RateLimitError,
+    AuthenticationError,
+)
+
+from ..errors import (
+    LLMError,
+    LLMAPIError,
+    LLMTimeoutError,
+    LLMRateLimitError,
+    LLMAuthenticationError,
+)
+
+# 重试退避参数（秒）：第n次重试等待 min(RETRY_MAX_DELAY, RETRY_INITIAL_DELAY * 2**n)，再叠加抖动
+RETRY_INITIAL_DELAY = 1.0
+RETRY_MAX_DELAY = 20.0
+# 可重试的HTTP状态码（限流、网关错误、服务不可用等）
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+# SDK异常类型到统一异常类型的映射
+_ERROR_MAPPING = {
+    AuthenticationError: LLMAuthenticationError,
+    RateLimitError: LLMRateLimitError,
+    APITimeoutError: LLMTimeoutError,
+    APIError: LLMAPIError,
+}
+
+
+class RetryMixin:
+    """
+    指数退避重试与SDK异常转换
+
+    使用方需提供 max_retries、timeout 属性和 provider_name
+    """
+
+    @staticmethod
+    def _get_retry_after(error: Exception) -> Optional[float]:
+        """从响应头中读取Retry-After（秒，支持retry-after-ms），没有则返回None"""
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms is not None:
+                return float(retry_after_ms) / 1000
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """超时、连接错误、限流及5xx等瞬时错误才重试"""
+        if isinstance(error, APIConnectionError):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return False
+
+    async def _retry_with_backoff(self, func, *args, **kwargs):
+        """
+        指数退避重试
+
+        首次请求失败后最多重试 max_retries 次；等待时间按指数增长并设上限，
+        叠加随机抖动避免大量请求同时重试加剧限流；服务端返回Retry-After时以其为下限
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func(*args, **kwargs)
+            except APIError as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = min(RETRY_MAX_DELAY, RETRY_INITIAL_DELAY * 2 ** attempt)
+                delay *= 1 - 0.25 * random.random()
+                retry_after = self._get_retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                await asyncio.sleep(delay)
+
+    def _convert_error(self, error: Exception) -> LLMError:
+        """转换错误为统一格式"""
+        # 沿MRO查找第一个已映射的SDK异常类型（子类优先，如APITimeoutError先于APIError）
+        error_class = next(
+            (_ERROR_MAPPING[base] for base in type(error).__mro__ if base in _ERROR_MAPPING),
+            LLMError,
+        )
+        kwargs: Dict[str, Any] = {
+            "message": str(error),
+            "provider": self.provider_name,
+            "original_error": error,
+        }
+        if error_class is LLMRateLimitError:
+            retry_after = self._get_retry_after(error)
+            kwargs["retry_after"] = int(retry_after) if retry_after is not None else None
+        elif error_class is LLMTimeoutError:
+            kwargs["timeout"] = self.timeout
+        elif error_class is LLMAPIError:
+            kwargs["status_code"] = getattr(error, "status_code", None)
+        return error_class(**kwargs)
@@ -0,0 +1,111 @@
+"""
+流式响应工具
+
+逐token推送时，每个chunk都要穿过一次 async生成器 / FastAPI / SSE 的边界，
+高并发下这部分开销会超过token本身。这里按时间窗口或chunk数量把相邻的chunk
+合并后再向下游推送，感知延迟只增加一个很小的窗口
+"""
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from .types import AssistantOutputMessage, StreamChunk
+
+
+def _join(values: List[Optional[str]]) -> Optional[str]:
+    """拼接增量文本，全部为空时返回None"""
+    parts = [value for value in values if value]
+    return "".join(parts) if parts else None
+
+
+def merge_stream_chunks(chunks: List[StreamChunk]) -> StreamChunk:
+    """
+    合并多个流式响应块
+
+    文本类增量按顺序拼接，tool_calls依次追加；
+    finish_reason、usage、model 取最后一个非空值
+
+    Args:
+        chunks: 流式响应块列表（非空）
+
+    Returns:
+        合并后的流式响应块
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+
+    tool_calls = [tc for chunk in chunks for tc in (chunk.delta.tool_calls or [])]
+    audio = [chunk.delta.audio for chunk in chunks if chunk.delta.audio is not None]
+    return StreamChunk(
+        delta=AssistantOutputMessage(
+            content=_join([chunk.delta.content for chunk in chunks]),
+            refusal=_join([chunk.delta.refusal for chunk in chunks]),
+            reasoning_content=_join([chunk.delta.reasoning_content for chunk in chunks]),
+            tool_calls=tool_calls or None,
+            audio=audio[-1] if audio else None,
+        ),
+        finish_reason=next((c.finish_reason for c in reversed(chunks) if c.finish_reason), None),
+        usage=next((c.usage for c in reversed(chunks) if c.usage), None),
+        model=next((c.model for c in reversed(chunks) if c.model), None),
+    )
+
+
+async def coalesce_stream(
+    source: AsyncIterator[StreamChunk],
+    max_delay: float = 0.05,
+    max_chunks: int = 8,
+) -> AsyncIterator[StreamChunk]:
+    """
+    按时间窗口/数量合并流式响应块
+
+    收到第一个chunk后开始计时，满 max_delay 秒或攒够 max_chunks 个即合并推送；
+    携带finish_reason或usage的chunk会立即触发推送，保证结束信息不被延迟
+
+    Args:
+        source: 原始流（如 BaseLLMClient.stream_chat）
+        max_delay: 合并窗口（秒）
+        max_chunks: 单次合并的最大chunk数
+
+    Yields:
+        合并后的流式响应块
+    """
+    loop = asyncio.get_running_loop()
+    iterator = source.__aiter__()
+    buffer: List[StreamChunk] = []
+    deadline = 0.0
+    # 等待中的 __anext__ 不能因超时被取消（会中断上游生成器），跨窗口保留
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield merge_stream_chunks(buffer)
+                buffer = []
+                continue
+
+            future, pending = pending, None
+            try:
+                chunk = future.result()
+            except StopAsyncIteration:
+                break
+
+            if not buffer:
+                deadline = loop.time() + max_delay
+            buffer.append(chunk)
+            if len(buffer) >= max_chunks or chunk.finish_reason or chunk.usage:
+                yield merge_stream_chunks(buffer)
+                buffer = []
+
+        if buffer:
+            yield merge_stream_chunks(buffer)
+    finally:
+        # 下游提前停止时关闭上游生成器（如释放HTTP连接），不等到垃圾回收时才关闭；
+        # 先取消并等待进行中的 __anext__ 结束，否则 aclose 会因生成器仍在运行而失败
+        if pending is not None:
+            pending.cancel()
+            await asyncio.wait({pending})
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
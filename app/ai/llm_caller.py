@@ -3,14 +3,19 @@ LLM调用封装
 
 提供CLG1通用执行逻辑的封装
 """
-import json
+import asyncio
+import logging
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, Optional, Union, Tuple
+from typing import AsyncIterator, Dict, Any, List, Optional, Union, Tuple
+import orjson
 import structlog
 
 from app.ai.llm.factory import get_llm
-from app.ai.llm.types import LLMRequest, UserMessage, Usage
+from app.ai.llm.types import LLMRequest, UserMessage, AssistantMessage, Usage
 from app.ai.llm.errors import LLMError
+from app.ai.llm.cache import ResponseCache, LRUResponseCache, make_cache_key
+from app.ai.llm.streaming import coalesce_stream
 from app.ai.prompts.prompt_loader import get_prompt_loader
 from app.ai.prompts.prompt_config import PROMPT_CONFIG
 from app.utils.json_utils import JsonParser
@@ -18,6 +23,22 @@ from app.services.llm_logging_service import get_llm_logging_service
 from app.shared.utils.datetime import datetime_now
 
 logger = structlog.get_logger(__name__)
+# structlog通过标准库logging输出，日志级别以标准库logger为准
+_std_logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SceneTemplate:
+    """场景调用模板（场景配置与调用器默认值合并后的结果，每个场景只计算一次）"""
+    provider: str
+    model: str
+    temperature: float
+    max_completion_tokens: int
+    top_p: Optional[float]
+    system: Optional[str]
+    json_output: bool
+    additional_params: Optional[Dict[str, Any]]
+    use_cache: bool
 
 
 class LLMCaller:
@@ -28,7 +49,8 @@ class LLMCaller:
         default_provider: str = "volcengine",
         default_model: str = "doubao-1.5-pro-32k-250115",
         default_temperature: float = 0.1,
-        default_max_completion_tokens: int = 2000
+        default_max_completion_tokens: int = 2000,
+        response_cache: Optional[ResponseCache] = None
     ):
         """
         初始化LLM调用器
@@ -38,6 +60,7 @@ class LLMCaller:
             default_model: 默认模型
             default_temperature: 默认温度参数
             default_max_completion_tokens: 默认最大token数
+            response_cache: 响应缓存（可选，默认使用进程内LRU缓存）
         """
         self.default_provider = default_provider
         self.default_model = default_model
@@ -46,6 +69,8 @@ class LLMCaller:
         self.prompt_loader = get_prompt_loader()
         # 移除固定的LLM客户端，改为按需创建
         self._llm_clients = {}  # 缓存不同provider的LLM客户端
+        self.response_cache = response_cache or LRUResponseCache()
+        self._scene_templates: Dict[str, SceneTemplate] = {}
 
         logger.info(
             "llm_caller_initialized",
@@ -71,6 +96,50 @@ class LLMCaller:
             )
         return self._llm_clients[provider]
 
+    def _get_scene_template(self, scene_name: str) -> SceneTemplate:
+        """
+        获取场景调用模板
+
+        PROMPT_CONFIG在运行期不变，合并结果按场景缓存，每次调用只需叠加显式传参
+
+        Args:
+            scene_name: 场景名称
+
+        Returns:
+            场景调用模板
+        """
+        template = self._scene_templates.get(scene_name)
+        if template is None:
+            scene_config = PROMPT_CONFIG.get(scene_name, {})
+            template = SceneTemplate(
+                provider=scene_config.get("provider") or self.default_provider,
+                model=scene_config.get("model") or self.default_model,
+                temperature=scene_config.get("temperature", self.default_temperature),
+                max_completion_tokens=scene_config.get("max_completion_tokens") or self.default_max_completion_tokens,
+                top_p=scene_config.get("top_p"),
+                system=scene_config.get("system"),
+                json_output=scene_config.get("json_output", False),
+                additional_params=scene_config.get("additional_params", None),
+                use_cache=scene_config.get("cache", False),
+            )
+            self._scene_templates[scene_name] = template
+        return template
+
+    @staticmethod
+    def _add_usage(total: Optional[Usage], usage: Optional[Usage]) -> Optional[Usage]:
+        """累加多次调用的token消耗"""
+        if total is None or usage is None:
+            return total or usage
+        reasoning_tokens = None
+        if total.reasoning_tokens is not None or usage.reasoning_tokens is not None:
+            reasoning_tokens = (total.reasoning_tokens or 0) + (usage.reasoning_tokens or 0)
+        return Usage(
+            prompt_tokens=total.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=total.completion_tokens + usage.completion_tokens,
+            total_tokens=total.total_tokens + usage.total_tokens,
+            reasoning_tokens=reasoning_tokens
+        )
+
     async def call_with_scene(
         self,
         scene_name: str,
@@ -107,19 +176,20 @@ class LLMCaller:
             LLMError: LLM调用失败
             json.JSONDecodeError: JSON解析失败
         """
-        # 1. 读取场景配置
-        scene_config = PROMPT_CONFIG.get(scene_name, {})
+        # 1. 读取场景模板（场景配置 + 默认值）
+        template = self._get_scene_template(scene_name)
 
         # 2. 合并参数（显式传参 > 场景配置 > 默认值）
-        final_provider = provider or scene_config.get("provider") or self.default_provider
-        final_model = model or scene_config.get("model") or self.default_model
-        final_temperature = temperature if temperature is not None else scene_config.get("temperature", self.default_temperature)
-        final_max_completion_tokens = max_completion_tokens or scene_config.get("max_completion_tokens") or self.default_max_completion_tokens
-        final_top_p = top_p if top_p is not None else scene_config.get("top_p")
-        final_system = system_prompt or scene_config.get("system")
+        final_provider = provider or template.provider
+        final_model = model or template.model
+        final_temperature = temperature if temperature is not None else template.temperature
+        final_max_completion_tokens = max_completion_tokens or template.max_completion_tokens
+        final_top_p = top_p if top_p is not None else template.top_p
+        final_system = system_prompt or template.system
         # 修复：确保 parse_json 参数能够正确覆盖场景配置
-        final_json_output = parse_json if parse_json is not None else scene_config.get("json_output", False)
-        final_additional_params = scene_config.get("additional_params", None)
+        final_json_output = parse_json if parse_json is not None else template.json_output
+        final_additional_params = template.additional_params
+        final_use_cache = template.use_cache
         try:
             prompt = self.prompt_loader.load_prompt(
                 scene_name=scene_name,
@@ -150,7 +220,8 @@ class LLMCaller:
                 top_p=final_top_p,
                 parse_json=final_json_output,
                 scene_name=scene_name,
-                additional_params=final_additional_params
+                additional_params=final_additional_params,
+                use_cache=final_use_cache
             )
             return response
         except LLMError as e:
@@ -172,6 +243,130 @@ class LLMCaller:
                 error=error
             )
     
+    async def call_many_with_scene(
+        self,
+        scene_name: str,
+        template_vars_list: List[Dict[str, Any]],
+        max_concurrency: int = 10,
+        **kwargs: Any
+    ) -> List[Union[Dict[str, Any], str, BaseException]]:
+        """
+        同一场景下批量并发调用LLM（批量筛选简历、批量意图识别等）
+
+        每个请求仍走 call_with_scene（缓存、JSON解析、执行日志均保持一致），
+        并发数由信号量限制，避免瞬间打满provider限流
+
+        Args:
+            scene_name: 场景名称
+            template_vars_list: 模板变量字典列表，每个元素对应一次调用
+            max_concurrency: 最大并发数
+            **kwargs: 透传给 call_with_scene 的其他参数
+
+        Returns:
+            与template_vars_list顺序一致的结果列表，单个调用失败时对应位置为异常对象
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(template_vars: Dict[str, Any]) -> Union[Dict[str, Any], str]:
+            async with semaphore:
+                return await self.call_with_scene(
+                    scene_name=scene_name,
+                    template_vars=template_vars,
+                    **kwargs
+                )
+
+        return await asyncio.gather(
+            *[_one(template_vars) for template_vars in template_vars_list],
+            return_exceptions=True
+        )
+
+    async def stream_with_scene(
+        self,
+        scene_name: str,
+        template_vars: Dict[str, Any],
+        system_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_completion_tokens: Optional[int] = None,
+        top_p: Optional[float] = None,
+        provider: Optional[str] = None,
+        batch_ms: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        基于场景名称流式调用LLM，逐段返回文本增量
+
+        适用于直接展示给用户的长文本回复（首个token即可返回，不必等待完整生成），
+        不做JSON解析和响应缓存；参数合并规则与 call_with_scene 一致。
+        目前没有接口使用：现有场景都输出JSON（需拿到完整结果才能解析），
+        候选人回复经消息通道而非HTTP响应下发；新增纯文本场景时配合 create_sse_response 使用
+
+        Args:
+            scene_name: 场景名称
+            template_vars: 模板变量字典
+            system_prompt: 系统提示词（可选，优先级高于配置）
+            model: 模型名称（可选，优先级高于配置）
+            temperature: 温度参数（可选，优先级高于配置）
+            max_completion_tokens: 最大token数（可选，优先级高于配置）
+            top_p: top_p参数（可选，优先级高于配置）
+            provider: LLM provider名称（可选，优先级高于配置）
+            batch_ms: 合并窗口（毫秒，可选）；设置后相邻token合并推送，减少下游逐token的开销
+
+        Yields:
+            文本增量
+
+        Raises:
+            LLMError: LLM调用失败
+        """
+        template = self._get_scene_template(scene_name)
+        final_provider = provider or template.provider
+        final_model = model or template.model
+        final_temperature = temperature if temperature is not None else template.temperature
+        final_max_completion_tokens = max_completion_tokens or template.max_completion_tokens
+        final_top_p = top_p if top_p is not None else template.top_p
+
+        prompt = self.prompt_loader.load_prompt(scene_name=scene_name, template_vars=template_vars)
+        request = LLMRequest(
+            model=final_model,
+            messages=[UserMessage(content=prompt)],
+            system=system_prompt or template.system,
+            temperature=final_temperature,
+            max_completion_tokens=final_max_completion_tokens,
+            top_p=final_top_p,
+            additional_params=template.additional_params
+        )
+
+        started_at = datetime_now()
+        error = None
+        usage = None
+        parts: List[str] = []
+        stream = self._get_llm_client(final_provider).stream_chat(request)
+        if batch_ms:
+            stream = coalesce_stream(stream, max_delay=batch_ms / 1000)
+        try:
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.delta.content:
+                    parts.append(chunk.delta.content)
+                    yield chunk.delta.content
+        except LLMError as e:
+            error = e
+            raise
+        finally:
+            await self._log_llm_execution(
+                scene_name=scene_name,
+                provider=final_provider,
+                model=final_model,
+                temperature=final_temperature,
+                top_p=final_top_p,
+                max_completion_tokens=final_max_completion_tokens,
+                usage=usage,
+                template_variables=template_vars,
+                response="".join(parts),
+                started_at=started_at,
+                error=error
+            )
+
     async def _log_llm_execution(
         self,
         scene_name: str,
@@ -221,7 +416,7 @@ class LLMCaller:
                 top_p=top_p,
                 max_completion_tokens=max_completion_tokens,
                 template_variables=template_variables,
-                response_content= json.dumps(response, ensure_ascii=False) if isinstance(response, (dict, list)) else response,
+                response_content=orjson.dumps(response).decode("utf-8") if isinstance(response, (dict, list)) else response,
                 prompt_tokens=prompt_tokens,
                 completion_tokens=completion_tokens,
                 total_tokens=total_tokens,
@@ -250,7 +445,9 @@ class LLMCaller:
         top_p: Optional[float] = None,
         parse_json: bool = True,
         scene_name: Optional[str] = None,
-        additional_params: Optional[Dict[str, Any]] = None
+        additional_params: Optional[Dict[str, Any]] = None,
+        use_cache: bool = False,
+        json_retries: int = 1
     ) -> Tuple[Union[Dict[str, Any], str], Optional[Usage]]:
         """
         直接使用Prompt调用LLM
@@ -265,6 +462,9 @@ class LLMCaller:
             top_p: top_p参数
             parse_json: 是否解析JSON响应
             scene_name: 场景名称（用于日志记录）
+            additional_params: 动态参数
+            use_cache: 是否使用响应缓存（相同请求直接返回缓存结果，命中时usage为None；temperature为0时总是使用）
+            json_retries: JSON解析失败时的纠错重试次数（把错误信息作为新一轮用户消息回传给模型）
 
         Returns:
             LLM响应结果（parse_json=True时为字典，parse_json=False时为原始字符串，JSON解析失败时为原始字符串）
@@ -295,14 +495,43 @@ class LLMCaller:
             scene_name=scene_name,
             provider=provider,
             model=model,
-            prompt_length=len(prompt),
-            system_prompt=system_prompt,
-            prompt=prompt
+            prompt_length=len(prompt)
         )
+        # 完整prompt可能有几十KB，只在DEBUG级别输出，避免每次调用都序列化
+        if _std_logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "llm_call_prompt",
+                scene_name=scene_name,
+                system_prompt=system_prompt,
+                prompt=prompt
+            )
 
         try:
-            # 调用LLM
-            response = await llm_client.chat(request)
+            # 调用LLM（命中缓存时跳过网络调用）
+            # temperature为0的请求输出是确定的，总是可以复用
+            cache_key = None
+            response = None
+            if use_cache or temperature == 0:
+                cache_key = make_cache_key(
+                    provider, model, system_prompt, prompt, temperature,
+                    max_completion_tokens, top_p, additional_params
+                )
+                response = await self.response_cache.get(cache_key)
+
+            cache_hit = response is not None
+            if cache_hit:
+                logger.info(
+                    "llm_cache_hit",
+                    scene_name=scene_name,
+                    provider=provider,
+                    model=model
+                )
+                # 缓存命中没有实际消耗token，不返回usage，避免重复统计
+                usage = None
+            else:
+                response = await llm_client.chat(request)
+                usage = response.usage if response.usage else None
+
             content = response.content or ""
 
             logger.info(
@@ -313,28 +542,71 @@ class LLMCaller:
                 prompt_tokens=response.usage.prompt_tokens,
                 completion_tokens=response.usage.completion_tokens,
                 total_tokens=response.usage.total_tokens,
-                response_length=len(content),
-                response=response
+                response_length=len(content)
             )
-
-            # 解析JSON
+            if _std_logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "llm_call_response",
+                    scene_name=scene_name,
+                    content=content
+                )
+
+            result: Union[Dict[str, Any], str] = content
+            # 只有可用的结果才写入缓存，避免解析失败的响应在TTL内被反复命中
+            cacheable = not parse_json
             if parse_json:
-                try:
-                    return JsonParser.parse(content), response.usage if response.usage else None
-                except Exception as e:
-                    logger.error(
-                        "parse_llm_response_failed",
-                        scene_name=scene_name,
-                        provider=provider,
-                        model=model,
-                        error=str(e),
-                        content=content,
-                        exc_info=True
-                    )
-                    return content, response.usage if response.usage else None
-            else:
-                # 直接返回原始响应内容
-                return content, response.usage if response.usage else None
+                # 缓存中的响应已经是纠错后的最终结果，不再重试
+                retries_left = 0 if cache_hit else json_retries
+                while True:
+                    try:
+                        result = JsonParser.parse(content)
+                        cacheable = True
+                        break
+                    except Exception as e:
+                        if retries_left <= 0:
+                            logger.error(
+                                "parse_llm_response_failed",
+                                scene_name=scene_name,
+                                provider=provider,
+                                model=model,
+                                error=str(e),
+                                content=content,
+                                exc_info=True
+                            )
+                            result = content
+                            break
+                        retries_left -= 1
+                        logger.warning(
+                            "llm_json_retry",
+                            scene_name=scene_name,
+                            provider=provider,
+                            model=model,
+                            error=str(e)
+                        )
+                        request.messages.extend([
+                            AssistantMessage(content=content),
+                            UserMessage(content=f"你上面的输出无法解析为JSON（{e}），请修正后只输出合法的JSON。")
+                        ])
+                        try:
+                            response = await llm_client.chat(request)
+                        except LLMError as retry_error:
+                            # 纠错请求失败时退回原始内容，与不重试时的行为一致
+                            logger.error(
+                                "llm_json_retry_failed",
+                                scene_name=scene_name,
+                                provider=provider,
+                                model=model,
+                                error=str(retry_error)
+                            )
+                            result = content
+                            break
+                        usage = self._add_usage(usage, response.usage)
+                        content = response.content or ""
+
+            if not cache_hit and cacheable and cache_key is not None:
+                await self.response_cache.set(cache_key, response)
+
+            return result, usage
 
         except LLMError as e:
             logger.error(
@@ -1,4 +1,7 @@
-PROMPT_CONFIG = {
+from types import MappingProxyType
+from typing import Any, Mapping
+
+_SCENE_CONFIGS = {
     "matching": {
         "provider": "volcengine",
         "model": "volcengine/qwen-plus",
@@ -14,6 +17,8 @@ PROMPT_CONFIG = {
         "max_completion_tokens": 3000,
         "prompt": "text_translate.md",
         "json_output": True,
+        # 输入只有原文和目标语言；模板化的AI回复（问候、固定问题）会在不同会话中反复翻译，结果可直接复用
+        "cache": True,
         "additional_params": {
             "reasoning_effort": "minimal"
         }
@@ -28,6 +33,9 @@ PROMPT_CONFIG = {
         "system": "你是一个 AI 助手，你能根据我的要求给我准确的回复，并且会简明扼要的回答。",
         "prompt": "transfer_human_intent.md",
         "json_output": True,
+        # 只依赖候选人最后一条消息的yes/no判断（temperature/top_p都很低），
+        # "你好"、"好的"这类短消息在不同会话中大量重复，相同消息的判断结果可复用
+        "cache": True,
         "alias_name": "TransferHumanIntent"
     },
     "candidate_emotion": {
@@ -301,4 +309,11 @@ PROMPT_CONFIG = {
         }
         """
     }
-}
\ No newline at end of file
+}
+
+# 场景配置在运行期只读：LLMCaller与PromptLoader按场景缓存了合并结果和预编译模板，
+# 运行期修改不会生效，因此以只读映射对外提供
+PROMPT_CONFIG: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    scene_name: MappingProxyType(scene_config)
+    for scene_name, scene_config in _SCENE_CONFIGS.items()
+})
@@ -8,7 +8,7 @@ from typing import Dict, Optional, Any
 from pathlib import Path
 import structlog
 
-from app.ai.prompts.variable_substitution import substitute_variables
+from app.ai.prompts.variable_substitution import CompiledTemplate, compile_template
 from app.ai.prompts.prompt_config import PROMPT_CONFIG
 
 logger = structlog.get_logger(__name__)
@@ -30,6 +30,8 @@ class PromptLoader:
 
         self.base_dir = Path(base_dir)
         self._template_cache: Dict[str, str] = {}
+        # 场景 -> 预编译模板
+        self._compiled_cache: Dict[str, CompiledTemplate] = {}
 
         logger.info("prompt_loader_initialized", base_dir=str(self.base_dir))
 
@@ -98,6 +100,8 @@ class PromptLoader:
         Args:
             prompt_file: 模板文件名，如果为None则清除所有缓存
         """
+        # 预编译模板按场景缓存，统一失效
+        self._compiled_cache.clear()
         if prompt_file is None:
             self._template_cache.clear()
             logger.info("all_prompt_template_cache_cleared")
@@ -105,12 +109,41 @@ class PromptLoader:
             del self._template_cache[prompt_file]
             logger.info("prompt_template_cache_cleared", prompt_file=prompt_file)
 
-    def load_prompt(self, scene_name: str, template_vars: Dict[str, Any]) -> str:
-         # 1. 读取场景配置
+    def _compile_scene(self, scene_name: str) -> CompiledTemplate:
+        """读取并预编译场景模板，结果按场景缓存"""
         scene_config = PROMPT_CONFIG.get(scene_name, {})
         template = self.load_template(scene_config.get("module"), scene_config.get("prompt"))
-        prompt = substitute_variables(template, template_vars, missing_key_behavior="empty")
-        return prompt
+        compiled = compile_template(template)
+        self._compiled_cache[scene_name] = compiled
+        return compiled
+
+    def preload(self) -> int:
+        """
+        启动时预加载并预编译所有场景的模板，避免首次调用时在事件循环中同步读文件
+
+        模板文件缺失的场景跳过，首次调用时仍会抛出FileNotFoundError
+
+        Returns:
+            预加载成功的场景数
+        """
+        loaded = 0
+        for scene_name, scene_config in PROMPT_CONFIG.items():
+            if not scene_config.get("prompt"):
+                continue
+            try:
+                self._compile_scene(scene_name)
+                loaded += 1
+            except FileNotFoundError:
+                continue
+        logger.info("prompt_templates_preloaded", count=loaded)
+        return loaded
+
+    def load_prompt(self, scene_name: str, template_vars: Dict[str, Any]) -> str:
+        # 模板按场景预编译一次，之后每次调用只做变量取值与拼接
+        compiled = self._compiled_cache.get(scene_name)
+        if compiled is None:
+            compiled = self._compile_scene(scene_name)
+        return compiled.render(template_vars, missing_key_behavior="empty")
 
 # 全局单例
 _prompt_loader: Optional[PromptLoader] = None
@@ -4,12 +4,69 @@
 提供Prompt模板的变量替换功能，类似Java中的StringSubstitutor
 """
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 import structlog
 
 logger = structlog.get_logger(__name__)
 
 
+class CompiledTemplate:
+    """
+    预编译的模板
+
+    加载时把模板拆成固定文本片段与变量名，渲染时按变量取值后一次拼接，
+    不必每次调用都用正则扫描整个模板
+    """
+
+    def __init__(self, literals: List[str], names: List[Tuple[str, str]]):
+        """
+        Args:
+            literals: 固定文本片段，比变量多一个
+            names: (变量名, 原始占位符) 列表
+        """
+        self.literals = literals
+        self.names = names
+
+    def render(self, values: Dict[str, Any], missing_key_behavior: str = "keep") -> str:
+        """
+        渲染模板
+
+        Args:
+            values: 变量值字典
+            missing_key_behavior: 缺失key的处理方式，同 VariableSubstitutor.replace
+
+        Returns:
+            替换后的字符串
+        """
+        parts = [self.literals[0]]
+        for (var_name, placeholder), literal in zip(self.names, self.literals[1:]):
+            parts.append(_resolve(var_name, placeholder, values, missing_key_behavior))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def _resolve(var_name: str, placeholder: str, values: Dict[str, Any], missing_key_behavior: str) -> str:
+    """取单个变量的替换值"""
+    if var_name in values:
+        value = values[var_name]
+        # 转换为字符串
+        return str(value) if value is not None else ""
+    if missing_key_behavior == "keep":
+        return placeholder  # 保留原始占位符
+    elif missing_key_behavior == "empty":
+        logger.warning(
+            "variable_not_found_replaced_with_empty",
+            variable=var_name
+        )
+        return ""
+    elif missing_key_behavior == "error":
+        raise KeyError(f"变量 '{var_name}' 在values中不存在")
+    else:
+        raise ValueError(
+            f"不支持的missing_key_behavior: {missing_key_behavior}"
+        )
+
+
 class VariableSubstitutor:
     """变量替换器"""
 
@@ -71,37 +128,48 @@ class VariableSubstitutor:
         """
 
         def replacer(match):
-            var_name = match.group(1).strip()
-
-            if var_name in values:
-                value = values[var_name]
-                # 转换为字符串
-                return str(value) if value is not None else ""
-            else:
-                if missing_key_behavior == "keep":
-                    return match.group(0)  # 保留原始占位符
-                elif missing_key_behavior == "empty":
-                    logger.warning(
-                        "variable_not_found_replaced_with_empty",
-                        variable=var_name
-                    )
-                    return ""
-                elif missing_key_behavior == "error":
-                    raise KeyError(f"变量 '{var_name}' 在values中不存在")
-                else:
-                    raise ValueError(
-                        f"不支持的missing_key_behavior: {missing_key_behavior}"
-                    )
-
-        result = self.pattern.sub(replacer, template)
-
-        return result
+            return _resolve(match.group(1).strip(), match.group(0), values, missing_key_behavior)
+
+        return self.pattern.sub(replacer, template)
+
+    def compile(self, template: str) -> CompiledTemplate:
+        """
+        预编译模板，供同一模板多次渲染时复用
+
+        Args:
+            template: 模板字符串
+
+        Returns:
+            预编译的模板
+        """
+        literals: List[str] = []
+        names: List[Tuple[str, str]] = []
+        position = 0
+        for match in self.pattern.finditer(template):
+            literals.append(template[position:match.start()])
+            names.append((match.group(1).strip(), match.group(0)))
+            position = match.end()
+        literals.append(template[position:])
+        return CompiledTemplate(literals, names)
 
 
 # 全局单例
 _default_substitutor = VariableSubstitutor()
 
 
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    预编译模板（便捷函数）
+
+    Args:
+        template: 模板字符串
+
+    Returns:
+        预编译的模板
+    """
+    return _default_substitutor.compile(template)
+
+
 def substitute_variables(
     template: str,
     values: Dict[str, Any],
@@ -1,6 +1,7 @@
 """
 权限校验模块
 """
+import inspect
 from functools import wraps
 from typing import Any, Callable
 from uuid import UUID
@@ -24,23 +25,20 @@ def check_resource_permission(
         check_user: 是否检查用户权限
     """
     def decorator(func: Callable):
+        # 装饰时从函数签名确定资源ID参数（第一个以_id结尾的参数），每次请求直接按名取值
+        resource_param = next(
+            (name for name in inspect.signature(func).parameters if name.endswith('_id')),
+            None,
+        )
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             # 获取参数
-            resource_id = None
-            db = None
-            current_user = None
-
-            # 从kwargs中提取关键参数
-            for key, value in kwargs.items():
-                if key.endswith('_id') and isinstance(value, UUID):
-                    resource_id = value
-                elif key == 'db':
-                    db = value
-                elif key == 'current_user':
-                    current_user = value
-
-            if not all([resource_id, db, current_user]):
+            resource_id = kwargs.get(resource_param)
+            db = kwargs.get('db')
+            current_user = kwargs.get('current_user')
+
+            if not isinstance(resource_id, UUID) or db is None or current_user is None:
                 raise HTTPException(status_code=500, detail="权限校验参数不完整")
 
             # 检查资源是否存在和权限
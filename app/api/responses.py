@@ -1,11 +1,17 @@
 """
 统一API响应格式模块
 """
-from typing import Any, Optional, Union
+from functools import lru_cache
+from typing import Any, AsyncIterator, Optional, Type, Union
+import orjson
+import structlog
 from fastapi import HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
 
-from app.schemas.base import APIResponse, PaginatedResponse
+from app.schemas.base import APIResponse
+
+logger = structlog.get_logger(__name__)
 
 
 def create_success_response(
@@ -64,8 +70,10 @@ def create_paginated_response(
     """
     创建分页响应
 
+    已经是dict的数据项直接使用，只有Pydantic模型才转换为dict，避免整页数据被再复制一遍
+
     Args:
-        items: 数据项列表
+        list: 数据项列表
         total: 总数
         page: 当前页码
         page_size: 每页数量
@@ -74,17 +82,44 @@ def create_paginated_response(
     Returns:
         APIResponse: 统一格式的分页响应
     """
-    paginated_data = PaginatedResponse(
-        total=total,
-        page=page,
-        pageSize=page_size,
-        list=list
-    )
-
     return APIResponse(
         code=200,
         message=message,
-        data=paginated_data.model_dump()
+        data={
+            "total": total,
+            "page": page,
+            "pageSize": page_size,
+            "list": [item.model_dump() if isinstance(item, BaseModel) else item for item in list],
+        }
+    )
+
+
+def create_sse_response(chunks: AsyncIterator[str]) -> StreamingResponse:
+    """
+    创建SSE流式响应
+
+    每个文本增量以 `data: {"content": "..."}` 事件推送，结束时推送 `event: done`；
+    关闭代理缓冲，保证增量能即时到达客户端
+    （目前尚无路由使用，见 LLMCaller.stream_with_scene）
+
+    Args:
+        chunks: 文本增量异步迭代器（如 LLMCaller.stream_with_scene）
+
+    Returns:
+        StreamingResponse: text/event-stream 响应
+    """
+    async def event_stream() -> AsyncIterator[str]:
+        async for content in chunks:
+            yield f"data: {orjson.dumps({'content': content}).decode()}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
     )
 
 
@@ -156,17 +191,17 @@ def handle_service_error(e: Exception, operation: str = "操作") -> APIResponse
             code=e.status_code
         )
 
-    # 根据异常类型返回不同的错误信息
-    if "permission" in str(e).lower():
+    # 根据异常信息返回不同的错误信息（异常信息只转换一次）
+    message = str(e)
+    lowered = message.lower()
+    if "permission" in lowered:
         return create_permission_denied_response()
 
-    if "not found" in str(e).lower() or "不存在" in str(e):
+    if "not found" in lowered or "不存在" in message:
         return create_not_found_response()
 
     # 记录详细错误（在生产环境中）
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.error(f"{operation}失败: {str(e)}", exc_info=True)
+    logger.error("service_operation_failed", operation=operation, error=message, exc_info=True)
 
     return create_error_response(
         message=error_message,
@@ -174,6 +209,12 @@ def handle_service_error(e: Exception, operation: str = "操作") -> APIResponse
     )
 
 
+@lru_cache(maxsize=None)
+def _list_adapter(schema_class: Type[BaseModel]) -> TypeAdapter:
+    """按模型类缓存列表校验器，整个列表在pydantic-core中一次完成校验和导出"""
+    return TypeAdapter(list[schema_class])
+
+
 def validate_response_data(data: Any, schema_class: BaseModel) -> Any:
     """
     验证响应数据格式
@@ -187,7 +228,8 @@ def validate_response_data(data: Any, schema_class: BaseModel) -> Any:
     """
     try:
         if isinstance(data, list):
-            return [schema_class.model_validate(item).model_dump() for item in data]
+            adapter = _list_adapter(schema_class)
+            return adapter.dump_python(adapter.validate_python(data))
         else:
             return schema_class.model_validate(data).model_dump()
     except Exception as e:
@@ -82,15 +82,33 @@ class DynamicNodeExecutor:
             count=len(node_names),
             timeout=timeout
         )
-        tasks = []
-        task_to_name: Dict[asyncio.Task, str] = {}
-        for name in node_names:
-            task = asyncio.create_task(self.execute(name, context))
-            tasks.append(task)
-            task_to_name[task] = name
+        tasks = {
+            name: asyncio.create_task(self.execute(name, context))
+            for name in node_names
+        }
+        return await self.gather_tasks(tasks, timeout=timeout)
+
+    async def gather_tasks(
+        self,
+        tasks: Dict[str, asyncio.Task],
+        timeout: float = 90.0
+    ) -> Dict[str, Optional[NodeResult]]:
+        """
+        等待已启动的节点任务（带超时和部分成功支持）
+
+        供调用方提前启动部分节点（如投机执行）后统一收集结果
+
+        Args:
+            tasks: 节点名称到执行任务的映射
+            timeout: 超时时间（秒），默认90秒
+
+        Returns:
+            节点执行结果字典，语义同 execute_parallel
+        """
+        task_to_name: Dict[asyncio.Task, str] = {task: name for name, task in tasks.items()}
         
         done, pending = await asyncio.wait(
-            tasks,
+            task_to_name.keys(),
             timeout=timeout,
             return_when=asyncio.ALL_COMPLETED
         )
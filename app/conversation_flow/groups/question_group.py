@@ -8,7 +8,7 @@
 4. 数据库查询优化（减少重复操作）
 """
 import asyncio
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Sequence
 import structlog
 from uuid import UUID
 
@@ -171,7 +171,7 @@ class QuestionGroupExecutor(NodeExecutor):
             next_node = await self.executor.execute(next_node.next_node[0], context)
         return next_node
 
-    def same_question_turns_interval(self, question: str, history: List[Message]) -> Optional[int]:
+    def same_question_turns_interval(self, question: str, history: Sequence[Message]) -> Optional[int]:
         if not history:
             return None
         talk_turns = 0
@@ -5,11 +5,14 @@
 """
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Sequence
 from uuid import UUID
 from datetime import datetime
 from pydantic import BaseModel
 
+from app.utils.token_utils import DEFAULT_HISTORY_TOKEN_BUDGET, trim_history
+
 
 class ConversationStage(str, Enum):
     """会话阶段枚举"""
@@ -148,7 +151,7 @@ class ConversationContext:
 
     # 消息相关
     last_candidate_message: str  # 候选人最后一条消息
-    history: List[Message]  # 历史对话
+    history: Sequence[Message]  # 历史对话（创建后转为tuple，不可修改）
 
     # 职位信息
     position_info: PositionInfo
@@ -187,6 +190,8 @@ class ConversationContext:
         # 验证history必须是列表
         if not isinstance(self.history, list):
             raise ValueError(f"history必须是列表类型，当前类型: {type(self.history)}")
+        # 转为不可变序列：formatted_history/last_hr_message 基于history缓存，history不能再被修改
+        self.history = tuple(self.history)
 
         # 验证position_info不能为None
         if not self.position_info:
@@ -194,12 +199,13 @@ class ConversationContext:
 
     def get_template_vars(self) -> Dict[str, Any]:
         """获取Prompt模板变量"""
+        history = self.formatted_history
         return {
             # 统一变量名（驼峰命名法）
             "lastCandidateMessage": self.last_candidate_message,
-            "chatHistory": self.format_history(),
+            "chatHistory": history,
             "jobTitle": self.position_info.name,
-            "lastHRMessage": self.get_last_hr_message(),
+            "lastHRMessage": self.last_hr_message,
             "currentQuestion": self.current_question_content or "",
             
             # 职位相关详细信息
@@ -208,7 +214,7 @@ class ConversationContext:
             
             # 兼容旧变量名
             "content": self.last_candidate_message,  # 候选人最后一条消息
-            "chatMessage": self.format_history(),  # 历史对话
+            "chatMessage": history,  # 历史对话
             "knowledge": self.format_knowledge_base(),  # 知识库内容
             "question": self.current_question_content or "",  # 当前问题
         }
@@ -217,14 +223,28 @@ class ConversationContext:
         """获取职位要求"""
         return f"问题：{self.current_question_content}，要求：{self.current_question_requirement}"
 
-    def format_history(self, max_messages: int = 10) -> str:
-        """格式化历史对话"""
-        recent_messages = self.history[-max_messages:] if len(self.history) > max_messages else self.history
+    def format_history(self, max_messages: int = 10, max_tokens: int = DEFAULT_HISTORY_TOKEN_BUDGET) -> str:
+        """格式化历史对话（最多保留最近max_messages条，再按token预算裁剪）"""
+        recent_messages = self.history[-max_messages:]
         formatted = []
         for msg in recent_messages:
             role = "求职者" if msg.sender == "candidate" else "招聘者"
             formatted.append(f"{role}: {msg.content}")
-        return "\n".join(formatted)
+        return "\n".join(trim_history(formatted, max_tokens))
+
+    @cached_property
+    def formatted_history(self) -> str:
+        """
+        格式化后的历史对话（按默认预算）
+
+        一次流程中每个节点都会取模板变量，history在上下文创建后不可修改，只计算一次
+        """
+        return self.format_history()
+
+    @cached_property
+    def last_hr_message(self) -> str:
+        """HR最后一句话（同上，只计算一次）"""
+        return self.get_last_hr_message()
 
     def get_last_hr_message(self) -> str:
         """获取HR最后一句话"""
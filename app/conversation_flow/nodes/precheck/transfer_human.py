@@ -3,7 +3,7 @@
 
 场景名：transfer_human_intent
 模板变量：候选人最后一条消息
-执行逻辑：CLG1
+执行逻辑：本地规则明确命中时直接返回，否则CLG1
 模型响应结果：{"transfer": "yes/no"}
 节点返回结果：
 - 执行结果为yes，action为SUSPEND
@@ -11,8 +11,13 @@
 """
 from typing import Dict, Any, Union, Optional
 
+import structlog
+
 from app.conversation_flow.models import NodeResult, ConversationContext, NodeAction
 from app.conversation_flow.nodes.base import SimpleLLMNode
+from app.conversation_flow.utils.fast_intent import match_transfer_human
+
+logger = structlog.get_logger(__name__)
 
 
 class TransferHumanIntentNode(SimpleLLMNode):
@@ -25,6 +30,13 @@ class TransferHumanIntentNode(SimpleLLMNode):
             node_name=self.node_name,
         )
 
+    async def _do_execute(self, context: ConversationContext) -> NodeResult:
+        """执行节点：本地规则明确命中时跳过LLM调用"""
+        if match_transfer_human(context.last_candidate_message):
+            logger.debug("transfer_human_rule_matched", conversation_id=str(context.conversation_id))
+            return await self._parse_llm_response({"transfer": "yes"}, context)
+        return await super()._do_execute(context)
+
     async def _parse_llm_response(
         self,
         llm_response: Union[Dict[str, Any], str],
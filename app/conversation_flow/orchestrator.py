@@ -6,10 +6,17 @@
 2. Stage路由
 3. 组间并行调度（Stage2时）
 4. 结果选择策略
+
+投机执行：绝大多数消息的前置检查结论都是"继续主流程"，因此对话回复组
+（只读、无副作用）与前置检查同时启动；前置检查中断流程时取消并丢弃投机结果，
+把两次串行的LLM往返压缩为一次
 """
 import asyncio
+from typing import Optional
+
 import structlog
 
+from app.core.config import settings
 from app.conversation_flow.models import (
     FlowResult,
     NodeResult,
@@ -33,10 +40,17 @@ logger = structlog.get_logger(__name__)
 class ConversationFlowOrchestrator:
     """会话流程编排器"""
     
-    def __init__(self):
+    def __init__(self, speculative_response: Optional[bool] = None):
         """
         初始化流程编排器
+
+        Args:
+            speculative_response: 是否在前置检查期间投机执行对话回复组，默认读取配置
+                CONVERSATION_SPECULATIVE_RESPONSE
         """
+        if speculative_response is None:
+            speculative_response = settings.CONVERSATION_SPECULATIVE_RESPONSE
+        self.speculative_response = speculative_response
         
         # 初始化节点工厂和执行器
         
@@ -64,22 +78,37 @@ class ConversationFlowOrchestrator:
             stage=context.conversation_stage.value
         )
         
+        # 投机执行对话回复组（假设前置检查结论为继续主流程）
+        response_task: Optional[asyncio.Task] = None
+        if self.speculative_response:
+            response_task = asyncio.create_task(
+                self.executor.execute(ResponseGroupExecutor.node_name, context)
+            )
+
         try:
             # ============ 阶段1：前置并行检查（N1 + N2） ============
             precheck_result = await self._precheck_phase(context)
             if self.is_break_flow(precheck_result.action) or not precheck_result.next_node:
+                self._discard_speculation(response_task, precheck_result)
                 return FlowResult.from_node_result(precheck_result)
             
             if precheck_result.next_node and precheck_result.next_node[0] == HighEQResponseNode.node_name:
+                self._discard_speculation(response_task, precheck_result)
                 result = await self.executor.execute(precheck_result.next_node[0], context)
                 return FlowResult.from_node_result(result)
 
+            if response_task is None:
+                response_task = asyncio.create_task(
+                    self.executor.execute(ResponseGroupExecutor.node_name, context)
+                )
             if await self._should_question_stage(context):
-                return await self.process_message_stage(context)
+                return await self.process_message_stage(context, response_task)
             else:
-                response_result = await self.executor.execute(ResponseGroupExecutor.node_name, context)
+                response_result = await response_task
                 return FlowResult.from_node_result(response_result)
         except Exception as e:
+            if response_task is not None and not response_task.done():
+                response_task.cancel()
             logger.error(
                 "flow_execution_failed",
                 conversation_id=str(context.conversation_id),
@@ -141,18 +170,50 @@ class ConversationFlowOrchestrator:
     
     def is_break_flow(self, action: NodeAction) -> bool:    
         return action == NodeAction.SUSPEND or action == NodeAction.TERMINATE
+
+    def _discard_speculation(self, response_task: Optional[asyncio.Task], precheck_result: NodeResult) -> None:
+        """
+        前置检查未进入主流程时丢弃投机执行的对话回复
+
+        Args:
+            response_task: 投机执行的对话回复组任务
+            precheck_result: 前置检查结果
+        """
+        if response_task is None:
+            return
+        response_task.cancel()
+        logger.info(
+            "speculative_response_discarded",
+            precheck_node=precheck_result.node_name,
+            action=precheck_result.action.value
+        )
     
-    async def process_message_stage(self, context: ConversationContext) -> FlowResult:
+    async def process_message_stage(
+        self,
+        context: ConversationContext,
+        response_task: Optional[asyncio.Task] = None
+    ) -> FlowResult:
         """
         处理消息阶段
         
         Args:
             context: 会话上下文
+            response_task: 已启动的对话回复组任务（投机执行），为空时在此启动
             
         Returns:
             节点执行结果
         """
-        results = await self.executor.execute_parallel(node_names=[QuestionGroupExecutor.node_name, ResponseGroupExecutor.node_name], context=context, timeout=60)
+        if response_task is None:
+            response_task = asyncio.create_task(
+                self.executor.execute(ResponseGroupExecutor.node_name, context)
+            )
+        question_task = asyncio.create_task(
+            self.executor.execute(QuestionGroupExecutor.node_name, context)
+        )
+        results = await self.executor.gather_tasks(
+            {QuestionGroupExecutor.node_name: question_task, ResponseGroupExecutor.node_name: response_task},
+            timeout=60
+        )
         question_result = results.get(QuestionGroupExecutor.node_name, None)
         response_result = results.get(ResponseGroupExecutor.node_name, None)
 
@@ -0,0 +1,49 @@
+"""
+本地规则意图识别
+
+在调用LLM之前用预编译的正则做一次快速判断：
+只有高置信度、无歧义的命中才直接返回结论，其余情况返回None交给LLM判断
+覆盖中文、英文、印尼语的常见表达
+"""
+import re
+from typing import Optional
+
+# 明确要求转人工的表达（只匹配请求句式，"人工客服"等名词单独出现不算；
+# 排除"人工智能""人工审核"，招聘对话中AI岗位经常出现这类词）
+_TRANSFER_HUMAN_PATTERN = re.compile(
+    r"(转|我要|找|接|换)人工(客服)?(?!智能|审核)"
+    r"|\b(talk|speak|chat)\s+(to|with)\s+(a\s+)?(human|real\s+person|recruiter|live\s+agent)\b"
+    r"|\b(want|need)\s+(a\s+)?(human|live)\s+agent\b"
+    r"|\b(bicara|berbicara|ngobrol)\s+dengan\s+(manusia|admin|orang\s+asli)\b",
+    re.IGNORECASE,
+)
+
+# 否定/条件表达：出现时规则不做判断
+_NEGATION_PATTERN = re.compile(
+    r"不|别|没|无需|如果|是不是|吗"
+    r"|\b(don'?t|do\s+not|no\s+need|not|if|whether)\b"
+    r"|\b(tidak|tak|jangan|gak|nggak|kalau|apakah)\b",
+    re.IGNORECASE,
+)
+
+
+def match_transfer_human(message: Optional[str]) -> Optional[bool]:
+    """
+    规则判断候选人是否明确要求转人工
+
+    Args:
+        message: 候选人最后一条消息
+
+    Returns:
+        True表示明确要求转人工；None表示规则无法确定，需要LLM判断
+    """
+    if not message:
+        return None
+    # 以问号结尾的是询问而不是请求
+    if message.rstrip().endswith(("?", "？")):
+        return None
+    if not _TRANSFER_HUMAN_PATTERN.search(message):
+        return None
+    if _NEGATION_PATTERN.search(message):
+        return None
+    return True
@@ -58,6 +58,10 @@ class Settings(BaseSettings):
         },
         {
             "provider": "openai"        
+        },
+        {
+            "provider": "openai-batch",
+            "api_key_env": "OPENAI_API_KEY"
         }
     ]
     EMBEDDING_PROVIDERS: List[Dict] = [
@@ -66,6 +70,16 @@ class Settings(BaseSettings):
             "base_url": "https://ark.cn-beijing.volces.com/api/v3"
         }
     ]
+    # LLM共享HTTP连接池（总连接数需大于预期的并发请求数，否则请求会排队等待连接）
+    LLM_HTTP_MAX_CONNECTIONS: int = 256
+    LLM_HTTP_MAX_KEEPALIVE: int = 128
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 300  # 空闲连接保持时间（秒）
+    LLM_HTTP_CONNECT_TIMEOUT: float = 5.0  # 建立连接超时（秒），与读取超时分开，连不上时尽快失败
+    LLM_HTTP_CONNECT_RETRIES: int = 2  # 建立连接失败时由传输层直接重试的次数（请求尚未发出，重试安全）
+    # 单个LLM客户端同时发出的最大请求数（超出的请求在本地排队，避免瞬时流量触发provider限流）
+    LLM_MAX_CONCURRENT_REQUESTS: int = 250
+    # 前置检查期间是否投机执行对话回复组（前置检查中断流程时投机结果被丢弃，会多消耗一次LLM调用）
+    CONVERSATION_SPECULATIVE_RESPONSE: bool = False
     
     # Jaeger配置
     JAEGER_HOST: str = "localhost"
@@ -1,19 +1,32 @@
+import asyncio
+
+import structlog
 from fastapi import FastAPI
 from app.observability.instrumentation.database import setup_database_logging
 from app.core.config import settings
-from app.infrastructure.cache.redis import init_redis, close_redis
+from app.infrastructure.cache.redis import init_redis, close_redis, get_redis
+from app.ai.llm.cache import RedisResponseCache, TieredResponseCache
+from app.ai.llm_caller import get_llm_caller
+from app.ai.llm.providers.client_pool import close_http_client
+from app.ai.prompts.prompt_loader import get_prompt_loader
 from app.infrastructure.database.session import init_db, close_db
 from app.observability.logging.setup import setup_logging
 
+logger = structlog.get_logger(__name__)
+
 async def init_app(app: FastAPI):
     setup_logging()
+    check_event_loop()
     await init_db()
     await init_redis()
+    init_llm_cache()
+    get_prompt_loader().preload()
     await init_database_logging()
 
 async def close_app(app: FastAPI):
     await close_db()
     await close_redis()
+    await close_http_client()
 
 async def init_database_logging():
     from app.infrastructure.database.session import engine
@@ -21,4 +34,24 @@ async def init_database_logging():
         engine,
         log_queries=settings.LOG_DATABASE_QUERIES,
         slow_query_threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS
-    )
\ No newline at end of file
+    )
+
+def init_llm_cache():
+    """LLM响应缓存增加Redis层，多个worker进程共享开启了缓存的场景（如翻译、转人工意图）的结果"""
+    llm_caller = get_llm_caller()
+    # 重复初始化时不再叠加一层
+    if isinstance(llm_caller.response_cache, TieredResponseCache):
+        return
+    llm_caller.response_cache = TieredResponseCache(
+        llm_caller.response_cache,
+        RedisResponseCache(get_redis()),
+    )
+
+def check_event_loop():
+    """记录当前事件循环实现；生产环境未使用uvloop时告警（uvicorn loop=auto 在安装了uvloop时会自动启用）"""
+    loop = asyncio.get_running_loop()
+    loop_type = f"{type(loop).__module__}.{type(loop).__name__}"
+    if not loop_type.startswith("uvloop") and settings.ENVIRONMENT == "production":
+        logger.warning("event_loop_not_uvloop", loop=loop_type)
+    else:
+        logger.info("event_loop_initialized", loop=loop_type)
@@ -5,17 +5,17 @@ Knowledge Embedding Service
 """
 import asyncio
 import os
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 
-from app.ai.llm.providers.volcengine_embedding import VolcengineEmbeddingClient
 from app.models.job_knowledge_base import JobKnowledgeBase
 from app.models.knowledge_question_variant import KnowledgeQuestionVariant
 import structlog
 from app.ai.llm.factory import get_embedding
+from app.utils.event_loop import new_event_loop
 
 logger = structlog.get_logger(__name__)
 
@@ -165,6 +165,58 @@ class KnowledgeEmbeddingService:
             await self.db.rollback()
             raise
 
+    async def _embed_in_batch(
+        self,
+        model,
+        text_field: str,
+        embedding_field: str,
+        ids: List[UUID],
+        tenant_id: UUID
+    ) -> Tuple[int, int]:
+        """
+        批量生成embedding并写回数据库（文本合并为少量embedding请求，而不是每条一次）
+
+        Args:
+            model: ORM模型（JobKnowledgeBase / KnowledgeQuestionVariant）
+            text_field: 文本字段名
+            embedding_field: embedding字段名
+            ids: 记录ID列表
+            tenant_id: 租户ID
+
+        Returns:
+            (更新数, 跳过数)，跳过的是不存在（或不属于该租户）的记录
+        """
+        result = await self.db.execute(
+            select(model.id, getattr(model, text_field)).where(
+                model.id.in_(ids),
+                model.tenant_id == tenant_id
+            )
+        )
+        rows = result.all()
+        if rows:
+            embeddings = await self.embedding_client.embed_texts(
+                [text for _, text in rows],
+                model=self.EMBEDDING_MODEL,
+            )
+            # 按主键批量更新
+            await self.db.execute(
+                update(model),
+                [
+                    {"id": row_id, embedding_field: embedding}
+                    for (row_id, _), embedding in zip(rows, embeddings)
+                ],
+            )
+            await self.db.commit()
+
+        if len(rows) < len(ids):
+            found = {row_id for row_id, _ in rows}
+            logger.warning(
+                "embedding_records_skipped",
+                model=model.__tablename__,
+                ids=[str(record_id) for record_id in ids if record_id not in found]
+            )
+        return len(rows), len(ids) - len(rows)
+
     async def generate_batch_async(
         self,
         knowledge_ids: List[UUID],
@@ -183,7 +235,7 @@ class KnowledgeEmbeddingService:
         def _batch_task():
             """后台任务：批量生成embedding"""
             # 创建新的event loop（在线程中）
-            loop = asyncio.new_event_loop()
+            loop = new_event_loop()
             asyncio.set_event_loop(loop)
             try:
                 loop.run_until_complete(
@@ -211,18 +263,33 @@ class KnowledgeEmbeddingService:
         logger.info("starting_batch_embedding_processing", count=len(knowledge_ids))
 
         success_count = 0
+        skipped_count = 0
         failed_count = 0
 
         # 在独立线程中创建新的数据库会话
         from app.infrastructure.database.session import async_session_maker
         
         async with async_session_maker() as new_session:
-            for kid in knowledge_ids:
+            pending = knowledge_ids
+            try:
+                # 一次请求为全部条目生成embedding
+                success_count, skipped_count = await KnowledgeEmbeddingService(new_session)._embed_in_batch(
+                    JobKnowledgeBase, "question", "question_embedding", knowledge_ids, tenant_id
+                )
+                pending = []
+            except Exception as e:
+                # 批量失败时逐条处理，单条失败不影响其他条目
+                logger.warning("batch_embedding_fallback_to_single", error=str(e))
+                await new_session.rollback()
+
+            for kid in pending:
                 try:
                     # 使用新的会话创建 embedding 服务实例
                     new_embedding_service = KnowledgeEmbeddingService(new_session)
-                    await new_embedding_service.generate_for_knowledge(kid, tenant_id)
-                    success_count += 1
+                    if await new_embedding_service.generate_for_knowledge(kid, tenant_id):
+                        success_count += 1
+                    else:
+                        skipped_count += 1
                 except Exception as e:
                     logger.error("batch_embedding_failed_for_item",
                                knowledge_id=kid, error=str(e))
@@ -231,6 +298,7 @@ class KnowledgeEmbeddingService:
         logger.info("batch_embedding_completed",
                    total=len(knowledge_ids),
                    success=success_count,
+                   skipped=skipped_count,
                    failed=failed_count)
 
     async def generate_batch_variants_async(
@@ -247,7 +315,7 @@ class KnowledgeEmbeddingService:
         """
         def _batch_task():
             """后台任务：批量生成变体embedding"""
-            loop = asyncio.new_event_loop()
+            loop = new_event_loop()
             asyncio.set_event_loop(loop)
             try:
                 loop.run_until_complete(
@@ -274,18 +342,33 @@ class KnowledgeEmbeddingService:
         logger.info("starting_batch_variant_embedding_processing", count=len(variant_ids))
 
         success_count = 0
+        skipped_count = 0
         failed_count = 0
 
         # 在独立线程中创建新的数据库会话
         from app.infrastructure.database.session import async_session_maker
         
         async with async_session_maker() as new_session:
-            for vid in variant_ids:
+            pending = variant_ids
+            try:
+                # 一次请求为全部变体生成embedding
+                success_count, skipped_count = await KnowledgeEmbeddingService(new_session)._embed_in_batch(
+                    KnowledgeQuestionVariant, "variant_question", "variant_embedding", variant_ids, tenant_id
+                )
+                pending = []
+            except Exception as e:
+                # 批量失败时逐条处理，单条失败不影响其他变体
+                logger.warning("batch_variant_embedding_fallback_to_single", error=str(e))
+                await new_session.rollback()
+
+            for vid in pending:
                 try:
                     # 使用新的会话创建 embedding 服务实例
                     new_embedding_service = KnowledgeEmbeddingService(new_session)
-                    await new_embedding_service.generate_for_variant(vid, tenant_id)
-                    success_count += 1
+                    if await new_embedding_service.generate_for_variant(vid, tenant_id):
+                        success_count += 1
+                    else:
+                        skipped_count += 1
                 except Exception as e:
                     logger.error("batch_variant_embedding_failed_for_item",
                                variant_id=vid, error=str(e))
@@ -294,4 +377,5 @@ class KnowledgeEmbeddingService:
         logger.info("batch_variant_embedding_completed",
                    total=len(variant_ids),
                    success=success_count,
+                   skipped=skipped_count,
                    failed=failed_count)
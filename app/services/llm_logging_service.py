@@ -4,10 +4,10 @@ LLM日志记录服务
 提供异步的LLM执行日志和对话流程节点执行日志记录功能
 """
 import asyncio
-import json
 import time
 from datetime import datetime
 from typing import Optional, Dict, Any
+import orjson
 import structlog
 
 from app.models.llm_execution_log import LLMExecutionLog
@@ -119,7 +119,7 @@ class LLMLoggingService:
                     temperature=temperature,
                     top_p=top_p,
                     max_completion_tokens=max_completion_tokens,
-                    template_variables=json.dumps(template_variables, ensure_ascii=False) if template_variables else None,
+                    template_variables=orjson.dumps(template_variables, default=str, option=orjson.OPT_NON_STR_KEYS).decode() if template_variables else None,
                     response_content=response_content,
                     prompt_tokens=prompt_tokens,
                     completion_tokens=completion_tokens,
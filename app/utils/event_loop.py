@@ -0,0 +1,24 @@
+"""
+事件循环工具
+
+uvicorn[standard] 已安装uvloop，服务主循环默认使用它；
+但后台线程中手动创建的事件循环仍是标准asyncio实现，这里统一改为优先使用uvloop
+"""
+import asyncio
+import importlib.util
+
+_HAS_UVLOOP = importlib.util.find_spec("uvloop") is not None
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    创建新的事件循环（安装了uvloop时使用uvloop）
+
+    Returns:
+        事件循环实例
+    """
+    if _HAS_UVLOOP:
+        import uvloop
+
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
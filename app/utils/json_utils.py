@@ -2,21 +2,42 @@ import json
 import re
 from typing import Union
 
+import orjson
+
+# markdown代码块：取第一个 ```json ... ``` 中的内容（缺少结束标记时取到末尾）
+_FENCE_PATTERN = re.compile(r"```(?:json)?(.*?)(?:```|$)", re.DOTALL)
+# 模块级复用，raw_decode从指定位置解析出第一个完整的JSON值；
+# strict=False 允许字符串内出现未转义的换行等控制字符（LLM输出中常见）
+_LOOSE_DECODER = json.JSONDecoder(strict=False)
+
 
 class JsonParser:
     """通用 JSON 解析类"""
 
     @staticmethod
     def parse(reply) -> Union[dict, list]:
-        """解析回复数据"""
+        """
+        解析回复数据
+
+        依次尝试：原文严格解析 -> 去除markdown代码块后严格解析 ->
+        宽松解析第一个JSON值 -> 修复后手动解析
+        """
+        if isinstance(reply, (dict, list)):
+            return reply
+        if isinstance(reply, str):
+            # 大多数回复就是纯JSON，不做任何预处理直接解析
+            try:
+                return orjson.loads(reply)
+            except orjson.JSONDecodeError:
+                pass
+        reply = JsonParser.clean_reply(reply)
         try:
-            if isinstance(reply, dict):
-                return reply
-            if isinstance(reply, list):
-                return reply
-            reply = JsonParser.clean_reply(reply)
-            return json.loads(reply)
-        except json.JSONDecodeError:
+            return orjson.loads(reply)
+        except orjson.JSONDecodeError:
+            pass
+        try:
+            return JsonParser.extract_first(reply)
+        except ValueError:
             fixed_reply = JsonParser.fix_json(reply)
             return JsonParser.manual_parse(fixed_reply)
 
@@ -25,11 +46,21 @@ class JsonParser:
         if not isinstance(reply, str):
             print(f"无法解析的行: {reply}")
             return str(reply)  # 将非字符串类型转换为字符串
-        # 移除可能的markdown格式
-        reply = re.sub(r'```json|```|\n', '', reply)
+        # 移除可能的markdown格式：一次匹配取出代码块内容
+        match = _FENCE_PATTERN.search(reply)
+        if match:
+            reply = match.group(1)
         # 移除多余的空白字符
-        reply = reply.strip()
-        return reply
+        return reply.strip()
+
+    @staticmethod
+    def extract_first(reply: str) -> Union[dict, list]:
+        """从夹杂说明文字的回复中解析第一个JSON对象或数组"""
+        starts = [i for i in (reply.find('{'), reply.find('[')) if i >= 0]
+        if not starts:
+            raise ValueError(f"回复中没有JSON: {reply}")
+        result, _ = _LOOSE_DECODER.raw_decode(reply, min(starts))
+        return result
 
     @staticmethod
     def fix_json(json_str) -> str:
@@ -0,0 +1,55 @@
+"""
+token估算与对话历史裁剪
+
+在条数上限之外再按token预算裁剪最近的对话：条数上限控制常规对话的prompt长度，
+token预算防止少数长消息把prompt撑爆上下文窗口
+
+使用的模型（doubao等）没有公开的本地分词器，这里按字符类别估算token数：
+CJK字符约1个token，其余字符约4个字符1个token，对预算控制足够准确
+"""
+import re
+from typing import List
+
+# 对话历史默认token预算（不含system prompt和模板其余部分）
+DEFAULT_HISTORY_TOKEN_BUDGET = 3000
+
+_CJK_PATTERN = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的token数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def trim_history(lines: List[str], max_tokens: int = DEFAULT_HISTORY_TOKEN_BUDGET) -> List[str]:
+    """
+    从最新一条往前累计token，超出预算即停止
+
+    最新一条消息即使单独超出预算也会保留，保证模型至少能看到当前上下文
+
+    Args:
+        lines: 按时间正序排列的对话行
+        max_tokens: token预算
+
+    Returns:
+        裁剪后的对话行（仍为时间正序）
+    """
+    total = 0
+    start = len(lines)
+    for index in range(len(lines) - 1, -1, -1):
+        total += estimate_tokens(lines[index])
+        if total > max_tokens and index < len(lines) - 1:
+            break
+        start = index
+    return lines[start:]
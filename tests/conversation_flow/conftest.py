@@ -69,6 +69,13 @@ def stage2_context(sample_context):
     return sample_context
 
 
+@pytest.fixture
+def stage3_context(sample_context):
+    """Stage3（职位意向阶段）上下文"""
+    sample_context.conversation_stage = ConversationStage.INTENTION
+    return sample_context
+
+
 class MockLLMResponse:
     """Mock LLM响应"""
 
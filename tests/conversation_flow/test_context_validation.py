@@ -289,3 +289,30 @@ class TestPositionInfoValidation:
         )
         assert position.description is None
         assert position.requirements is None
+
+
+class TestHistoryImmutable:
+    """测试history创建后不可修改"""
+
+    def test_history_frozen(self, sample_context):
+        """history转为tuple，缓存的格式化结果不会过期"""
+        assert isinstance(sample_context.history, tuple)
+        assert "招聘者: 您好！感谢您关注我们的Python工程师职位。" in sample_context.formatted_history
+        assert sample_context.last_hr_message == "您好！感谢您关注我们的Python工程师职位。"
+
+        with pytest.raises(AttributeError):
+            sample_context.history.append(Message(sender="ai", content="新消息"))
+
+
+class TestFormatHistory:
+    """测试历史对话格式化"""
+
+    def test_message_cap(self, sample_context):
+        """短消息也最多保留最近max_messages条"""
+        sample_context.history = tuple(
+            Message(sender="candidate", content=f"消息{i}") for i in range(20)
+        )
+
+        lines = sample_context.format_history().split("\n")
+
+        assert lines == [f"求职者: 消息{i}" for i in range(10, 20)]
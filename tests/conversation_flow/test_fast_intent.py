@@ -0,0 +1,47 @@
+"""
+测试本地规则意图识别
+"""
+import pytest
+
+from app.conversation_flow.utils.fast_intent import match_transfer_human
+
+
+class TestMatchTransferHuman:
+    """测试转人工规则"""
+
+    @pytest.mark.parametrize("message", [
+        "帮我转人工",
+        "我要找人工客服",
+        "换人工",
+        "I want a live agent",
+        "Can I talk to a human please",
+        "saya mau bicara dengan admin",
+    ])
+    def test_explicit_request_matched(self, message):
+        """明确要求转人工时命中"""
+        assert match_transfer_human(message) is True
+
+    @pytest.mark.parametrize("message", [
+        "不用转人工，你继续说",
+        "你是人工客服吗",
+        "I don't need to talk to a human",
+        "这个岗位薪资多少",
+        "",
+    ])
+    def test_ambiguous_falls_through(self, message):
+        """否定、疑问或无关消息交给LLM判断"""
+        assert match_transfer_human(message) is None
+
+    @pytest.mark.parametrize("message", [
+        "这个岗位要人工智能背景",
+        "我想转人工智能方向",
+        "要人工审核简历",
+        "你们是人工服务还是机器人",
+        "人工客服电话是多少",
+        "人工服务几点下班",
+        "is this a human agent?",
+        "可以转人工？",
+    ])
+    def test_noun_mention_or_question_falls_through(self, message):
+        """名词提及、人工智能/人工审核、以问号结尾的询问不直接判定为转人工"""
+        assert match_transfer_human(message) is None
@@ -0,0 +1,67 @@
+"""
+测试编排器投机执行对话回复组
+"""
+import asyncio
+import pytest
+
+from app.conversation_flow.models import NodeAction, NodeResult
+from app.conversation_flow.orchestrator import ConversationFlowOrchestrator
+
+
+def _make_orchestrator(precheck_result: NodeResult, response_delay: float = 0.0):
+    """构造替换了节点执行的编排器，记录对话回复组是否被取消"""
+    orchestrator = ConversationFlowOrchestrator(speculative_response=True)
+    orchestrator.response_cancelled = False
+
+    async def precheck(context):
+        await asyncio.sleep(0.01)
+        return precheck_result
+
+    orchestrator._precheck_phase = precheck
+
+    async def execute(node_name, context):
+        if node_name == "response_group":
+            try:
+                await asyncio.sleep(response_delay)
+            except asyncio.CancelledError:
+                orchestrator.response_cancelled = True
+                raise
+            return NodeResult(node_name="response_group", action=NodeAction.SEND_MESSAGE, message="回复")
+        return NodeResult(node_name=node_name, action=NodeAction.SEND_MESSAGE, message=node_name)
+
+    orchestrator.executor.execute = execute
+    return orchestrator
+
+
+class TestSpeculativeResponse:
+    """测试投机执行"""
+
+    @pytest.mark.asyncio
+    async def test_speculation_used(self, stage3_context):
+        """前置检查继续主流程时直接使用投机结果"""
+        precheck = NodeResult(
+            node_name="candidate_emotion",
+            action=NodeAction.NEXT_NODE,
+            next_node=["continue_conversation_with_candidate", "information_gathering"],
+        )
+        orchestrator = _make_orchestrator(precheck)
+
+        result = await orchestrator.execute(stage3_context)
+
+        assert result.message == "回复"
+
+    @pytest.mark.asyncio
+    async def test_speculation_discarded_on_suspend(self, stage3_context):
+        """前置检查中断流程时取消投机执行"""
+        precheck = NodeResult(node_name="transfer_human_intent", action=NodeAction.SUSPEND)
+        orchestrator = _make_orchestrator(precheck, response_delay=1)
+
+        result = await orchestrator.execute(stage3_context)
+        await asyncio.sleep(0)
+
+        assert result.action == NodeAction.SUSPEND
+        assert orchestrator.response_cancelled
+
+    def test_disabled_by_default(self):
+        """未显式开启时读取配置，默认关闭投机执行"""
+        assert ConversationFlowOrchestrator().speculative_response is False
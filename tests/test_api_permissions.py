@@ -0,0 +1,57 @@
+"""
+测试资源权限校验装饰器
+"""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.permissions import check_resource_permission
+
+
+def _make_endpoint(resource):
+    """构造被装饰的测试接口"""
+    service = SimpleNamespace(get=AsyncMock(return_value=resource))
+
+    @check_resource_permission(service, check_tenant=True, check_user=True)
+    async def endpoint(channel_id, db=None, current_user=None):
+        return "ok"
+
+    return endpoint, service
+
+
+class TestCheckResourcePermission:
+    """测试check_resource_permission"""
+
+    @pytest.mark.asyncio
+    async def test_allowed(self):
+        """同租户同用户时放行，并按签名中的ID参数查询资源"""
+        user = SimpleNamespace(id=uuid4(), tenant_id=uuid4())
+        endpoint, service = _make_endpoint(SimpleNamespace(tenant_id=user.tenant_id, user_id=user.id))
+        channel_id = uuid4()
+
+        assert await endpoint(channel_id=channel_id, db=object(), current_user=user) == "ok"
+        assert service.get.await_args.args[1] == channel_id
+
+    @pytest.mark.asyncio
+    async def test_other_tenant_forbidden(self):
+        """不同租户返回403"""
+        user = SimpleNamespace(id=uuid4(), tenant_id=uuid4())
+        endpoint, _ = _make_endpoint(SimpleNamespace(tenant_id=uuid4(), user_id=user.id))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await endpoint(channel_id=uuid4(), db=object(), current_user=user)
+
+        assert exc_info.value.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_missing_params(self):
+        """缺少校验参数时返回500"""
+        endpoint, _ = _make_endpoint(None)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await endpoint(channel_id=uuid4(), db=object())
+
+        assert exc_info.value.status_code == 500
@@ -0,0 +1,44 @@
+"""
+测试统一API响应格式
+"""
+import pytest
+from pydantic import BaseModel
+
+from app.api.responses import create_paginated_response, validate_response_data
+
+
+class _Item(BaseModel):
+    id: int
+    name: str
+
+
+class TestPaginatedResponse:
+    """测试create_paginated_response"""
+
+    def test_models_dumped_dicts_reused(self):
+        """模型数据项转换为dict，已是dict的数据项原样使用"""
+        row = {"id": 2, "name": "b"}
+
+        response = create_paginated_response(list=[_Item(id=1, name="a"), row], total=2, page=1, page_size=10)
+
+        assert response.code == 200
+        assert response.data == {
+            "total": 2,
+            "page": 1,
+            "pageSize": 10,
+            "list": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}],
+        }
+        assert response.data["list"][1] is row
+
+
+class TestValidateResponseData:
+    """测试validate_response_data"""
+
+    def test_list(self):
+        """列表数据逐项校验并导出为dict"""
+        assert validate_response_data([{"id": "1", "name": "a"}], _Item) == [{"id": 1, "name": "a"}]
+
+    def test_invalid(self):
+        """校验失败时抛出ValueError"""
+        with pytest.raises(ValueError):
+            validate_response_data([{"id": "x"}], _Item)
@@ -0,0 +1,48 @@
+"""
+测试LLM输出的JSON解析
+"""
+import pytest
+
+from app.utils.json_utils import JsonParser
+
+
+class TestJsonParser:
+    """测试JsonParser.parse"""
+
+    def test_plain_json(self):
+        """合法JSON直接解析"""
+        assert JsonParser.parse('{"a": [1, 2], "b": "中文"}') == {"a": [1, 2], "b": "中文"}
+
+    def test_markdown_fence(self):
+        """去除markdown代码块标记"""
+        assert JsonParser.parse('```json\n{"a": 1}\n```') == {"a": 1}
+
+    def test_fence_with_prose(self):
+        """代码块前后有说明文字时只取代码块内容"""
+        assert JsonParser.parse('结果如下：\n```json\n{"a": 1}\n```\n以上') == {"a": 1}
+
+    def test_unclosed_fence(self):
+        """代码块缺少结束标记（输出被截断）时取到末尾"""
+        assert JsonParser.parse('```json\n[1, 2]') == [1, 2]
+
+    def test_unfenced_json_with_prose(self):
+        """未使用代码块、前后有说明文字时解析第一个完整JSON"""
+        assert JsonParser.parse('判断结果：{"pass": true, "score": 8} 请参考') == {"pass": True, "score": 8}
+
+    def test_raw_newline_in_string(self):
+        """字符串内未转义的换行按原样保留"""
+        assert JsonParser.parse('```json\n{"reply": "第一行\n第二行"}\n```') == {"reply": "第一行\n第二行"}
+
+    def test_already_parsed(self):
+        """已是dict/list时原样返回"""
+        data = {"a": 1}
+        assert JsonParser.parse(data) is data
+
+    def test_trailing_comma_fallback(self):
+        """不合法JSON走修复后手动解析"""
+        assert JsonParser.parse('{"a": "x",}') == {"a": "x"}
+
+    def test_unparseable(self):
+        """无法解析时抛出ValueError"""
+        with pytest.raises(ValueError):
+            JsonParser.parse("没有JSON")
@@ -0,0 +1,198 @@
+"""
+测试LLM响应缓存
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.ai.llm.cache import LRUResponseCache, TieredResponseCache, make_cache_key
+from app.ai.llm.types import LLMResponse, AssistantOutputMessage, Usage
+from app.ai.llm_caller import LLMCaller
+
+
+def _make_response(content: str) -> LLMResponse:
+    """构造测试用LLM响应"""
+    return LLMResponse(
+        message=AssistantOutputMessage(content=content),
+        usage=Usage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+        finish_reason="stop",
+        model="test-model",
+    )
+
+
+class TestMakeCacheKey:
+    """测试缓存键生成"""
+
+    def test_same_parts_same_key(self):
+        """相同字段生成相同的键"""
+        assert make_cache_key("openai", "gpt-4", {"a": 1, "b": 2}) == make_cache_key(
+            "openai", "gpt-4", {"b": 2, "a": 1}
+        )
+
+    def test_field_boundary_no_collision(self):
+        """字段边界不同时生成不同的键"""
+        assert make_cache_key("ab", "c") != make_cache_key("a", "bc")
+
+    def test_none_and_empty_differ(self):
+        """None与空字符串生成不同的键"""
+        assert make_cache_key(None) != make_cache_key("")
+
+
+class TestLRUResponseCache:
+    """测试进程内LRU缓存"""
+
+    @pytest.mark.asyncio
+    async def test_get_set(self):
+        """写入后可以读取"""
+        cache = LRUResponseCache()
+        response = _make_response("hello")
+        await cache.set("k", response)
+        assert await cache.get("k") is response
+        assert await cache.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        """超出容量时淘汰最久未使用的条目"""
+        cache = LRUResponseCache(maxsize=2)
+        await cache.set("a", _make_response("a"))
+        await cache.set("b", _make_response("b"))
+        await cache.get("a")
+        await cache.set("c", _make_response("c"))
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert await cache.get("c") is not None
+        assert len(cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_ttl_expired(self):
+        """过期条目不再返回"""
+        cache = LRUResponseCache(ttl=-1)
+        await cache.set("k", _make_response("hello"))
+        assert await cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_stats(self):
+        """统计命中与未命中次数"""
+        cache = LRUResponseCache()
+        await cache.set("k", _make_response("hello"))
+        await cache.get("k")
+        await cache.get("missing")
+
+        assert cache.stats == {"hits": 1, "misses": 1}
+
+
+class TestTieredResponseCache:
+    """测试两级缓存"""
+
+    @pytest.mark.asyncio
+    async def test_shared_hit_fills_local(self):
+        """共享缓存命中后回填进程内缓存"""
+        shared = LRUResponseCache()
+        cache = TieredResponseCache(LRUResponseCache(), shared)
+        response = _make_response("hello")
+        await shared.set("k", response)
+
+        assert await cache.get("k") is response
+        assert await cache.local.get("k") is response
+
+    @pytest.mark.asyncio
+    async def test_set_writes_both(self):
+        """写入时两级都写"""
+        cache = TieredResponseCache(LRUResponseCache(), LRUResponseCache())
+        await cache.set("k", _make_response("hello"))
+
+        assert await cache.local.get("k") is not None
+        assert await cache.shared.get("k") is not None
+
+    @pytest.mark.asyncio
+    async def test_shared_failure_is_miss(self):
+        """共享缓存不可用时按未命中处理，不影响调用"""
+        shared = MagicMock()
+        shared.get = AsyncMock(side_effect=ConnectionError("redis down"))
+        shared.set = AsyncMock(side_effect=ConnectionError("redis down"))
+        cache = TieredResponseCache(LRUResponseCache(), shared)
+
+        assert await cache.get("k") is None
+        await cache.set("k", _make_response("hello"))
+        assert await cache.get("k") is not None
+        assert cache.stats == {"hits": 1, "misses": 1}
+
+
+class TestInitLLMCache:
+    """测试启动时接入Redis缓存层"""
+
+    def test_idempotent(self):
+        """重复初始化只包装一层"""
+        from app.init_app import init_llm_cache
+
+        caller = LLMCaller()
+        local = caller.response_cache
+        with patch("app.init_app.get_llm_caller", return_value=caller), \
+                patch("app.init_app.get_redis", return_value=MagicMock()):
+            init_llm_cache()
+            init_llm_cache()
+
+        assert isinstance(caller.response_cache, TieredResponseCache)
+        assert caller.response_cache.local is local
+
+
+class TestLLMCallerCache:
+    """测试LLMCaller使用响应缓存"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_llm_call(self):
+        """相同请求第二次命中缓存，不再调用LLM"""
+        caller = LLMCaller()
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(return_value=_make_response('{"transfer": "no"}'))
+        caller._llm_clients["volcengine"] = llm_client
+
+        first, first_usage = await caller.call_with_prompt(prompt="hi", use_cache=True)
+        second, second_usage = await caller.call_with_prompt(prompt="hi", use_cache=True)
+
+        assert first == second == {"transfer": "no"}
+        assert first_usage is not None
+        assert second_usage is None
+        assert llm_client.chat.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_disabled_by_default(self):
+        """未开启缓存时每次都调用LLM"""
+        caller = LLMCaller()
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(return_value=_make_response("hello"))
+        caller._llm_clients["volcengine"] = llm_client
+
+        await caller.call_with_prompt(prompt="hi", parse_json=False)
+        await caller.call_with_prompt(prompt="hi", parse_json=False)
+
+        assert llm_client.chat.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_scene_cache_enabled(self):
+        """开启缓存的场景（转人工意图）相同消息只调用一次LLM"""
+        caller = LLMCaller()
+        caller._log_llm_execution = AsyncMock()
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(return_value=_make_response('{"transfer": "no"}'))
+        caller._llm_clients["volcengine"] = llm_client
+
+        for _ in range(2):
+            result = await caller.call_with_scene("transfer_human_intent", {"lastCandidateMessage": "你好"})
+            assert result == {"transfer": "no"}
+
+        assert llm_client.chat.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_zero_temperature_cached(self):
+        """temperature为0的请求结果确定，未开启缓存时也会复用"""
+        caller = LLMCaller()
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(return_value=_make_response("hello"))
+        caller._llm_clients["volcengine"] = llm_client
+
+        await caller.call_with_prompt(prompt="hi", temperature=0, parse_json=False)
+        await caller.call_with_prompt(prompt="hi", temperature=0, parse_json=False)
+
+        assert llm_client.chat.call_count == 1
+        assert caller.response_cache.stats == {"hits": 1, "misses": 1}
@@ -0,0 +1,146 @@
+"""
+测试LLMCaller流式调用与JSON纠错重试
+"""
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.ai.llm.errors import LLMAPIError
+from app.ai.llm.types import AssistantOutputMessage, LLMResponse, StreamChunk, Usage
+from app.ai.llm_caller import LLMCaller
+from app.api.responses import create_sse_response
+
+
+def _make_stream(*contents: str):
+    """构造流式响应（最后一个chunk只携带usage）"""
+    async def stream_chat(request):
+        for content in contents:
+            yield StreamChunk(delta=AssistantOutputMessage(content=content))
+        yield StreamChunk(
+            delta=AssistantOutputMessage(),
+            finish_reason="stop",
+            usage=Usage(prompt_tokens=3, completion_tokens=len(contents), total_tokens=3 + len(contents)),
+        )
+    return stream_chat
+
+
+@pytest.fixture
+def caller():
+    """注入假客户端、跳过执行日志的LLMCaller"""
+    caller = LLMCaller()
+    caller._log_llm_execution = AsyncMock()
+    caller.prompt_loader = MagicMock()
+    caller.prompt_loader.load_prompt.return_value = "prompt"
+    llm_client = MagicMock()
+    llm_client.stream_chat = _make_stream("你好", "，", "欢迎")
+    caller._llm_clients["volcengine"] = llm_client
+    return caller
+
+
+class TestStreamWithScene:
+    """测试场景流式调用"""
+
+    @pytest.mark.asyncio
+    async def test_yields_deltas(self, caller):
+        """逐段返回文本增量，结束后记录完整内容和usage"""
+        parts = [part async for part in caller.stream_with_scene("casual_conversation", {})]
+
+        assert parts == ["你好", "，", "欢迎"]
+        log_kwargs = caller._log_llm_execution.call_args.kwargs
+        assert log_kwargs["response"] == "你好，欢迎"
+        assert log_kwargs["usage"].completion_tokens == 3
+
+    @pytest.mark.asyncio
+    async def test_sse_framing(self, caller):
+        """SSE响应按data事件推送增量，并以done事件结束"""
+        response = create_sse_response(caller.stream_with_scene("casual_conversation", {}))
+        events = [event async for event in response.body_iterator]
+
+        assert response.media_type == "text/event-stream"
+        assert response.headers["x-accel-buffering"] == "no"
+        assert json.loads(events[0][len("data: "):]) == {"content": "你好"}
+        assert events[-1].startswith("event: done")
+
+    @pytest.mark.asyncio
+    async def test_batch_ms_coalesces(self, caller):
+        """设置合并窗口后相邻增量合并推送"""
+        parts = [part async for part in caller.stream_with_scene("casual_conversation", {}, batch_ms=50)]
+
+        assert parts == ["你好，欢迎"]
+
+
+def _make_response(content: str) -> LLMResponse:
+    """构造测试用LLM响应"""
+    return LLMResponse(
+        message=AssistantOutputMessage(content=content),
+        usage=Usage(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+        finish_reason="stop",
+    )
+
+
+class TestJsonRetry:
+    """测试JSON解析失败后的纠错重试"""
+
+    @pytest.mark.asyncio
+    async def test_retry_with_feedback(self):
+        """解析失败时把错误回传给模型，重试成功后返回解析结果并累加usage"""
+        caller = LLMCaller()
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(side_effect=[_make_response("好的，结果是 yes"), _make_response('{"intent": "yes"}')])
+        caller._llm_clients["volcengine"] = llm_client
+
+        result, usage = await caller.call_with_prompt(prompt="hi")
+
+        assert result == {"intent": "yes"}
+        assert usage.total_tokens == 30
+        retry_request = llm_client.chat.call_args.args[0]
+        assert [m.role for m in retry_request.messages] == ["user", "assistant", "user"]
+
+    @pytest.mark.asyncio
+    async def test_retry_disabled(self):
+        """json_retries=0时直接返回原始内容"""
+        caller = LLMCaller()
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(return_value=_make_response("not json"))
+        caller._llm_clients["volcengine"] = llm_client
+
+        result, _ = await caller.call_with_prompt(prompt="hi", json_retries=0)
+
+        assert result == "not json"
+        assert llm_client.chat.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_request_failed(self):
+        """纠错请求失败时返回原始内容，不抛出异常"""
+        caller = LLMCaller()
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(side_effect=[
+            _make_response("not json"),
+            LLMAPIError(message="upstream error", provider="volcengine"),
+        ])
+        caller._llm_clients["volcengine"] = llm_client
+
+        result, _ = await caller.call_with_prompt(prompt="hi")
+
+        assert result == "not json"
+        assert llm_client.chat.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_unparsed_response_not_cached(self):
+        """解析失败的响应不写入缓存，解析成功后才写入"""
+        caller = LLMCaller()
+        caller.response_cache = MagicMock(get=AsyncMock(return_value=None), set=AsyncMock())
+        llm_client = MagicMock()
+        llm_client.chat = AsyncMock(return_value=_make_response("not json"))
+        caller._llm_clients["volcengine"] = llm_client
+
+        result, _ = await caller.call_with_prompt(prompt="hi", use_cache=True)
+
+        assert result == "not json"
+        caller.response_cache.set.assert_not_awaited()
+
+        llm_client.chat = AsyncMock(return_value=_make_response('{"intent": "yes"}'))
+        await caller.call_with_prompt(prompt="hi", use_cache=True)
+
+        caller.response_cache.set.assert_awaited_once()
@@ -0,0 +1,625 @@
+"""
+测试LLM客户端基类通用逻辑
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.ai.llm.base import BaseEmbeddingClient, BaseLLMClient
+from app.ai.llm.errors import LLMAPIError, LLMAuthenticationError, LLMError, LLMRateLimitError, LLMTimeoutError
+from app.ai.llm.providers.openai_batch import OpenAIBatchClient
+from app.ai.llm.providers.openai_client import OpenAIClient
+from app.ai.llm.providers.rate_limit import AdaptiveConcurrencyLimiter, parse_reset, record_rate_limit, wait_for_rate_limit
+from app.ai.llm.providers.volcengine_embedding import VolcengineEmbeddingClient
+from app.ai.llm.streaming import coalesce_stream
+from app.ai.llm.types import (
+    LLMRequest, LLMResponse, AssistantOutputMessage, StreamChunk, Usage, UserMessage,
+    EmbeddingData, EmbeddingRequest, EmbeddingResponse, EmbeddingUsage,
+    AssistantMessage, ToolMessage,
+)
+
+
+class FakeLLMClient(BaseLLMClient):
+    """记录并发数的假客户端"""
+
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.running = 0
+        self.max_running = 0
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    async def chat(self, request: LLMRequest) -> LLMResponse:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+
+        content = request.messages[0].content
+        if content == "boom":
+            raise LLMAPIError(message="boom", status_code=500, provider=self.provider_name)
+        return LLMResponse(
+            message=AssistantOutputMessage(content=content),
+            usage=Usage(prompt_tokens=1, completion_tokens=1, total_tokens=2),
+            finish_reason="stop",
+            model=request.model,
+        )
+
+    async def stream_chat(self, request: LLMRequest):
+        raise NotImplementedError
+
+
+def _make_request(content: str) -> LLMRequest:
+    """构造测试用LLM请求"""
+    return LLMRequest(model="test-model", messages=[UserMessage(content=content)])
+
+
+class TestChatMany:
+    """测试批量并发对话"""
+
+    @pytest.mark.asyncio
+    async def test_results_keep_order(self):
+        """结果顺序与请求顺序一致，失败请求返回异常对象"""
+        client = FakeLLMClient()
+        results = await client.chat_many([_make_request("a"), _make_request("boom"), _make_request("c")])
+
+        assert results[0].content == "a"
+        assert isinstance(results[1], LLMAPIError)
+        assert results[2].content == "c"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bounded(self):
+        """并发数不超过max_concurrency"""
+        client = FakeLLMClient()
+        await client.chat_many([_make_request(str(i)) for i in range(10)], max_concurrency=3)
+
+        assert client.max_running == 3
+
+
+class FakeEmbeddingClient(BaseEmbeddingClient):
+    """记录请求批次的假embedding客户端（向量为文本长度，结果乱序返回）"""
+
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.batches = []
+
+    @property
+    def provider_name(self) -> str:
+        return "fake"
+
+    async def create_embedding(self, request: EmbeddingRequest) -> EmbeddingResponse:
+        self.batches.append(list(request.input))
+        data = [
+            EmbeddingData(embedding=[float(len(text))], index=index)
+            for index, text in enumerate(request.input)
+        ]
+        return EmbeddingResponse(
+            data=list(reversed(data)),
+            model=request.model,
+            usage=EmbeddingUsage(prompt_tokens=1, total_tokens=1),
+        )
+
+
+class TestEmbedTexts:
+    """测试批量embedding"""
+
+    @pytest.mark.asyncio
+    async def test_sub_batches_keep_order(self):
+        """按chunk_size切分子批次，结果顺序与输入一致"""
+        client = FakeEmbeddingClient()
+        texts = ["a" * i for i in range(1, 6)]
+
+        embeddings = await client.embed_texts(texts, model="m", chunk_size=2)
+
+        assert client.batches == [texts[0:2], texts[2:4], texts[4:5]]
+        assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+
+    @pytest.mark.asyncio
+    async def test_empty_input(self):
+        """空列表不发请求"""
+        client = FakeEmbeddingClient()
+
+        assert await client.embed_texts([], model="m") == []
+        assert client.batches == []
+
+
+def _completion_line(custom_id: str, content: str) -> str:
+    """构造batch输出中的一行"""
+    return json.dumps({
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {
+                "id": f"chatcmpl-{custom_id}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o-mini",
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            },
+        },
+    })
+
+
+class TestOpenAIBatchClient:
+    """测试Batch API客户端"""
+
+    @pytest.mark.asyncio
+    async def test_submit_builds_jsonl(self):
+        """提交时每个请求生成一行JSONL，custom_id为下标"""
+        client = OpenAIBatchClient(api_key="test")
+        client.client = MagicMock()
+        client.client.files.create = AsyncMock(return_value=SimpleNamespace(id="file-1"))
+        client.client.batches.create = AsyncMock(return_value=SimpleNamespace(id="batch-1"))
+
+        batch_id = await client.submit([_make_request("a"), _make_request("b")])
+
+        assert batch_id == "batch-1"
+        _, content = client.client.files.create.call_args.kwargs["file"]
+        lines = [json.loads(line) for line in content.decode("utf-8").splitlines()]
+        assert [line["custom_id"] for line in lines] == ["0", "1"]
+        assert lines[1]["body"]["messages"][0]["content"] == "b"
+        assert lines[1]["body"]["stream"] is False
+
+    @pytest.mark.asyncio
+    async def test_fetch_restores_order(self):
+        """结果按custom_id回填，失败的请求为None"""
+        client = OpenAIBatchClient(api_key="test")
+        client.client = MagicMock()
+        client.client.batches.retrieve = AsyncMock(return_value=SimpleNamespace(
+            status="completed",
+            output_file_id="file-out",
+            request_counts=SimpleNamespace(total=3),
+        ))
+        output = "\n".join([_completion_line("2", "c"), _completion_line("0", "a")])
+        client.client.files.content = AsyncMock(return_value=SimpleNamespace(content=output.encode("utf-8")))
+
+        results = await client.fetch("batch-1")
+
+        assert [r.content if r else None for r in results] == ["a", None, "c"]
+
+
+    @pytest.mark.asyncio
+    async def test_wait_backs_off(self):
+        """轮询间隔逐次增大且不超过上限"""
+        client = OpenAIBatchClient(api_key="test")
+        client.poll = AsyncMock(side_effect=["validating", "in_progress", "in_progress", "completed"])
+
+        with patch("app.ai.llm.providers.openai_batch.asyncio.sleep", new=AsyncMock()) as sleep:
+            assert await client.wait("batch-1", poll_interval=10, max_poll_interval=20) == "completed"
+
+        assert [call.args[0] for call in sleep.call_args_list] == [10, 15, 20]
+
+    @pytest.mark.asyncio
+    async def test_run_failed_batch(self):
+        """batch未成功完成时抛出异常"""
+        client = OpenAIBatchClient(api_key="test")
+        client.submit = AsyncMock(return_value="batch-1")
+        client.wait = AsyncMock(return_value="expired")
+
+        with pytest.raises(LLMAPIError):
+            await client.run([_make_request("a")])
+
+
+class TestBuildRequestParams:
+    """测试请求参数构建"""
+
+    def test_messages_match_model_dump(self):
+        """纯文本消息走快速路径，结果与model_dump一致"""
+        client = OpenAIClient(api_key="test")
+        messages = [
+            UserMessage(content="hi"),
+            UserMessage(content="hi", name="bob"),
+            AssistantMessage(content="ok"),
+            ToolMessage(content="done", tool_call_id="call-1"),
+        ]
+        request = LLMRequest(model="test-model", system="sys", messages=messages, top_p=0.5)
+
+        params = client._build_request_params(request)
+
+        assert params["messages"][0] == {"role": "system", "content": "sys"}
+        assert params["messages"][1:] == [m.model_dump(exclude_none=True) for m in messages]
+        assert params["top_p"] == 0.5
+        assert "max_completion_tokens" not in params
+
+
+def _chunk(delta, finish_reason=None, usage=None):
+    """构造openai SDK的流式chunk"""
+    return ChatCompletionChunk.model_validate({
+        "id": "chunk",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+        "usage": usage,
+    })
+
+
+class _FakeStream:
+    """模拟openai SDK的AsyncStream（可迭代、可关闭）"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+
+class TestStreamChat:
+    """测试流式对话解析"""
+
+    @pytest.mark.asyncio
+    async def test_parse_chunks(self):
+        """文本增量、工具调用续传块（无name）和末尾usage块都能正确解析"""
+        stream = _FakeStream([
+            _chunk({"role": "assistant", "content": "你好"}),
+            _chunk({"tool_calls": [{"index": 0, "id": "call-1", "type": "function", "function": {"name": "f", "arguments": ""}}]}),
+            _chunk({"tool_calls": [{"index": 0, "function": {"arguments": "{}"}}]}, finish_reason="tool_calls"),
+            _chunk(None, usage={"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}),
+        ])
+
+        client = OpenAIClient(api_key="test")
+        client.client = MagicMock()
+        client.client.chat.completions.create = AsyncMock(return_value=stream)
+
+        chunks = [chunk async for chunk in client.stream_chat(_make_request("hi"))]
+
+        assert chunks[0].delta.content == "你好"
+        assert chunks[1].delta.tool_calls[0].function.name == "f"
+        assert chunks[2].delta.tool_calls[0].function.arguments == "{}"
+        assert chunks[2].finish_reason == "tool_calls"
+        assert chunks[3].usage.total_tokens == 3
+
+    @pytest.mark.asyncio
+    async def test_empty_delta_shared(self):
+        """没有内容的块共享同一个只读的空消息"""
+        stream = _FakeStream([
+            _chunk({"role": "assistant"}),
+            _chunk({}, finish_reason="stop"),
+            _chunk(None, usage={"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}),
+        ])
+
+        client = OpenAIClient(api_key="test")
+        client.client = MagicMock()
+        client.client.chat.completions.create = AsyncMock(return_value=stream)
+
+        chunks = [chunk async for chunk in client.stream_chat(_make_request("hi"))]
+
+        assert chunks[0].delta is chunks[1].delta is chunks[2].delta
+        assert chunks[0].delta.content is None
+        with pytest.raises(ValidationError):
+            chunks[0].delta.content = "x"
+
+    @pytest.mark.asyncio
+    async def test_early_exit_closes_stream(self):
+        """调用方提前结束迭代时关闭上游响应"""
+        stream = _FakeStream([_chunk({"content": "a"}), _chunk({"content": "b"})])
+        client = OpenAIClient(api_key="test")
+        client.client = MagicMock()
+        client.client.chat.completions.create = AsyncMock(return_value=stream)
+
+        chunks = client.stream_chat(_make_request("hi"))
+        assert (await chunks.__anext__()).delta.content == "a"
+        await chunks.aclose()
+
+        assert stream.closed
+
+
+class TestRequestConcurrency:
+    """测试请求并发额度"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_bounded(self):
+        """同时发出的请求数不超过max_concurrent_requests"""
+        client = OpenAIClient(api_key="test", max_concurrent_requests=2)
+        running = 0
+        max_running = 0
+
+        async def create(**params):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ChatCompletion.model_validate({
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "test-model",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            })
+
+        client.client = MagicMock()
+        client.client.chat.completions.create = create
+
+        responses = await asyncio.gather(*[client.chat(_make_request("hi")) for _ in range(5)])
+
+        assert [r.content for r in responses] == ["ok"] * 5
+        assert max_running == 2
+
+
+class TestAdaptiveConcurrency:
+    """测试自适应并发上限"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_halves_limit(self):
+        """收到429时并发上限减半"""
+        client = OpenAIClient(api_key="test", max_concurrent_requests=8)
+        func = AsyncMock(side_effect=_status_error(openai.RateLimitError, 429))
+
+        with pytest.raises(openai.RateLimitError):
+            await client._limited_call(func)
+
+        assert client._concurrency.limit == 4
+
+    def test_recovers_after_delay(self):
+        """冷却期内不恢复，冷却期过后每次成功加一"""
+        limiter = AdaptiveConcurrencyLimiter(4)
+        limiter.on_rate_limited()
+        limiter.on_success()
+        assert limiter.limit == 2
+
+        limiter._decreased_at -= 60
+        limiter.on_success()
+        limiter.on_success()
+        limiter.on_success()
+        assert limiter.limit == 4
+
+    def test_used_from_multiple_loops(self):
+        """同一个实例可在不同的事件循环中使用"""
+        limiter = AdaptiveConcurrencyLimiter(1)
+
+        async def hold():
+            async with limiter:
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(hold(), hold())
+
+        asyncio.run(run())
+        asyncio.run(run())
+
+
+class TestTimeout:
+    """测试请求超时配置"""
+
+    def test_connect_timeout_separate(self):
+        """建立连接超时与读取超时分开配置"""
+        client = OpenAIClient(api_key="test", timeout=120)
+
+        assert client.client.timeout.read == 120
+        assert client.client.timeout.connect == settings.LLM_HTTP_CONNECT_TIMEOUT
+
+
+class TestRateLimit:
+    """测试根据响应头的本地限流"""
+
+    def test_parse_reset(self):
+        """支持秒数与时长格式"""
+        assert parse_reset("1.5") == 1.5
+        assert parse_reset("6m0s") == 360.0
+        assert parse_reset("20ms") == 0.02
+        assert parse_reset("soon") is None
+        assert parse_reset(None) is None
+
+    @pytest.mark.asyncio
+    async def test_wait_until_reset(self):
+        """额度用尽后同一host的请求等待到重置时间，其他host不受影响"""
+        response = httpx.Response(
+            200,
+            headers={"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "2s"},
+            request=httpx.Request("POST", "https://ratelimited.example.com/v1/chat/completions"),
+        )
+        await record_rate_limit(response)
+
+        with patch("app.ai.llm.providers.rate_limit.asyncio.sleep", new=AsyncMock()) as sleep:
+            await wait_for_rate_limit("other.example.com")
+            sleep.assert_not_called()
+            await wait_for_rate_limit("ratelimited.example.com")
+
+        assert 1.5 < sleep.call_args.args[0] <= 2.0
+
+
+def _status_error(error_class, status_code: int, headers=None):
+    """构造openai SDK的HTTP状态错误"""
+    response = httpx.Response(
+        status_code,
+        headers=headers,
+        request=httpx.Request("POST", "https://api.example.com/v1/chat/completions"),
+    )
+    return error_class("error", response=response, body=None)
+
+
+class TestRetryWithBackoff:
+    """测试指数退避重试"""
+
+    @pytest.mark.asyncio
+    async def test_retry_transient_error(self):
+        """5xx错误重试后成功"""
+        client = OpenAIClient(api_key="test", max_retries=2)
+        func = AsyncMock(side_effect=[_status_error(openai.InternalServerError, 503), "ok"])
+
+        with patch("app.ai.llm.providers.retry.asyncio.sleep", new=AsyncMock()) as sleep:
+            assert await client._retry_with_backoff(func) == "ok"
+
+        assert func.call_count == 2
+        assert 0.75 <= sleep.call_args.args[0] <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_respected(self):
+        """限流时等待时间不小于Retry-After"""
+        client = OpenAIClient(api_key="test", max_retries=1)
+        error = _status_error(openai.RateLimitError, 429, headers={"retry-after": "7"})
+        func = AsyncMock(side_effect=[error, "ok"])
+
+        with patch("app.ai.llm.providers.retry.asyncio.sleep", new=AsyncMock()) as sleep:
+            assert await client._retry_with_backoff(func) == "ok"
+
+        assert sleep.call_args.args[0] == 7.0
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self):
+        """4xx错误不重试"""
+        client = OpenAIClient(api_key="test", max_retries=3)
+        func = AsyncMock(side_effect=_status_error(openai.BadRequestError, 400))
+
+        with pytest.raises(openai.BadRequestError):
+            await client._retry_with_backoff(func)
+
+        assert func.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted(self):
+        """重试耗尽后抛出最后一个错误"""
+        client = OpenAIClient(api_key="test", max_retries=2)
+        func = AsyncMock(side_effect=_status_error(openai.InternalServerError, 502))
+
+        with patch("app.ai.llm.providers.retry.asyncio.sleep", new=AsyncMock()):
+            with pytest.raises(openai.InternalServerError):
+                await client._retry_with_backoff(func)
+
+        assert func.call_count == 3
+
+
+class TestConvertError:
+    """测试SDK异常转换"""
+
+    def test_mapping(self):
+        """按异常类型（子类优先）转换为统一异常"""
+        client = OpenAIClient(api_key="test", timeout=5)
+        request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+
+        rate_limit = client._convert_error(_status_error(openai.RateLimitError, 429, headers={"retry-after": "3"}))
+        timeout = client._convert_error(openai.APITimeoutError(request=request))
+        server = client._convert_error(_status_error(openai.InternalServerError, 502))
+
+        assert isinstance(rate_limit, LLMRateLimitError) and rate_limit.retry_after == 3
+        assert isinstance(timeout, LLMTimeoutError) and timeout.timeout == 5
+        assert type(server) is LLMAPIError and server.status_code == 502
+        assert isinstance(client._convert_error(_status_error(openai.AuthenticationError, 401)), LLMAuthenticationError)
+        assert type(client._convert_error(ValueError("x"))) is LLMError
+
+
+class TestEmbeddingRetry:
+    """测试embedding客户端退避重试"""
+
+    @pytest.mark.asyncio
+    async def test_retry_with_jitter(self):
+        """5xx错误与对话客户端使用相同的退避策略重试，等待时间带抖动"""
+        client = VolcengineEmbeddingClient(api_key="test", max_retries=3)
+        func = AsyncMock(side_effect=[_status_error(openai.InternalServerError, 503), "ok"])
+
+        with patch("app.ai.llm.providers.retry.asyncio.sleep", new=AsyncMock()) as sleep:
+            assert await client._retry_with_backoff(func) == "ok"
+
+        assert 0.75 <= sleep.call_args.args[0] <= 1.0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_ms(self):
+        """retry-after-ms优先于退避时间"""
+        client = VolcengineEmbeddingClient(api_key="test", max_retries=1)
+        error = _status_error(openai.RateLimitError, 429, headers={"retry-after-ms": "2500"})
+        func = AsyncMock(side_effect=[error, "ok"])
+
+        with patch("app.ai.llm.providers.retry.asyncio.sleep", new=AsyncMock()) as sleep:
+            assert await client._retry_with_backoff(func) == "ok"
+
+        assert sleep.call_args.args[0] == 2.5
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self):
+        """4xx错误不重试"""
+        client = VolcengineEmbeddingClient(api_key="test", max_retries=3)
+        func = AsyncMock(side_effect=_status_error(openai.BadRequestError, 400))
+
+        with pytest.raises(openai.BadRequestError):
+            await client._retry_with_backoff(func)
+
+        assert func.call_count == 1
+
+
+class TestCoalesceStream:
+    """测试流式响应块合并"""
+
+    @staticmethod
+    async def _source(items):
+        """按 (延迟秒数, 内容, finish_reason) 依次产出chunk"""
+        for delay, content, finish_reason in items:
+            await asyncio.sleep(delay)
+            yield StreamChunk(delta=AssistantOutputMessage(content=content), finish_reason=finish_reason)
+
+    @pytest.mark.asyncio
+    async def test_merge_within_window(self):
+        """窗口内的chunk合并，超过窗口的单独推送，finish_reason保留在最后一个chunk"""
+        source = self._source([(0, "a", None), (0, "b", None), (0.1, "c", None), (0, "d", "stop")])
+        chunks = [chunk async for chunk in coalesce_stream(source, max_delay=0.03)]
+
+        assert [chunk.delta.content for chunk in chunks] == ["ab", "cd"]
+        assert chunks[-1].finish_reason == "stop"
+
+    @pytest.mark.asyncio
+    async def test_max_chunks(self):
+        """攒够max_chunks立即推送"""
+        source = self._source([(0, str(i), None) for i in range(5)])
+        chunks = [chunk async for chunk in coalesce_stream(source, max_delay=1, max_chunks=2)]
+
+        assert [chunk.delta.content for chunk in chunks] == ["01", "23", "4"]
+
+    @pytest.mark.asyncio
+    async def test_source_closed_on_early_exit(self):
+        """下游提前停止时关闭上游流"""
+        closed = []
+
+        async def source():
+            try:
+                for i in range(5):
+                    yield StreamChunk(delta=AssistantOutputMessage(content=str(i)))
+            finally:
+                closed.append(True)
+
+        stream = coalesce_stream(source(), max_delay=1, max_chunks=1)
+        async for _ in stream:
+            break
+        await stream.aclose()
+
+        assert closed == [True]
+
+    @pytest.mark.asyncio
+    async def test_source_closed_while_waiting(self):
+        """上游等待下一个chunk时下游停止，同样关闭上游流"""
+        closed = []
+
+        async def source():
+            try:
+                yield StreamChunk(delta=AssistantOutputMessage(content="a"))
+                await asyncio.sleep(10)
+                yield StreamChunk(delta=AssistantOutputMessage(content="b"))
+            finally:
+                closed.append(True)
+
+        stream = coalesce_stream(source(), max_delay=0.01)
+        async for _ in stream:
+            break
+        await stream.aclose()
+
+        assert closed == [True]
@@ -0,0 +1,64 @@
+"""
+测试LLM工厂函数的客户端缓存
+"""
+import pytest
+
+from app.ai.llm import factory
+from app.ai.llm.errors import LLMValidationError
+from app.ai.llm.factory import clear_cache, get_cache_info, get_llm
+
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    """设置测试密钥并清空缓存"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    clear_cache()
+    yield
+    clear_cache()
+
+
+class TestClientCache:
+    """测试客户端缓存"""
+
+    def test_same_params_reuse_client(self):
+        """相同参数复用同一个客户端实例"""
+        assert get_llm("openai") is get_llm("openai")
+        assert get_llm("openai", timeout=10) is not get_llm("openai", timeout=20)
+
+    def test_client_kept_when_new_key_added(self):
+        """创建其他参数的客户端后，已缓存的客户端仍被复用"""
+        client = get_llm("openai", timeout=10)
+        get_llm("openai", timeout=20)
+
+        assert get_llm("openai", timeout=10) is client
+        assert get_cache_info() == {"openai": 2}
+
+    def test_cache_hit_skips_validation(self, monkeypatch):
+        """命中缓存时不再读取环境变量"""
+        client = get_llm("openai")
+        monkeypatch.delenv("OPENAI_API_KEY")
+
+        assert get_llm("openai") is client
+
+    def test_unknown_provider_config(self):
+        """未配置的provider抛出校验错误"""
+        with pytest.raises(LLMValidationError):
+            factory._get_provider_config("unknown")
+
+    def test_cache_info_counts(self):
+        """缓存统计按provider计数，按provider清除后同步更新"""
+        get_llm("openai", timeout=10)
+        get_llm("openai", timeout=20)
+        get_llm("openai-batch")
+
+        assert get_cache_info() == {"openai": 2, "openai-batch": 1}
+
+        clear_cache("openai")
+
+        assert get_cache_info() == {"openai-batch": 1}
+
+    def test_provider_class_resolved_lazily(self):
+        """provider注册表按路径导入客户端类"""
+        from app.ai.llm.providers import OpenAIBatchClient
+
+        assert isinstance(get_llm("openai-batch"), OpenAIBatchClient)
@@ -0,0 +1,24 @@
+"""
+测试Prompt模板加载器
+"""
+from unittest.mock import patch
+
+from app.ai.prompts.prompt_loader import PromptLoader
+
+
+class TestPreload:
+    """测试启动时预加载模板"""
+
+    def test_preload_then_no_file_access(self):
+        """预加载后渲染不再读取模板文件"""
+        loader = PromptLoader()
+        assert loader.preload() > 0
+
+        with patch.object(loader, "load_template", side_effect=AssertionError("不应读取文件")):
+            prompt = loader.load_prompt("text_translate", {"source_text": "你好", "target_language": "English"})
+
+        assert "你好" in prompt
+
+    def test_missing_template_skipped(self, tmp_path):
+        """模板文件缺失的场景跳过，不影响启动"""
+        assert PromptLoader(base_dir=str(tmp_path)).preload() == 0
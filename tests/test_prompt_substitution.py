@@ -0,0 +1,34 @@
+"""
+测试Prompt模板变量替换
+"""
+import pytest
+
+from app.ai.prompts.variable_substitution import compile_template, substitute_variables
+
+
+TEMPLATE = "岗位：${job}\n候选人：${ name }\n${job}|${missing}"
+
+
+class TestCompiledTemplate:
+    """测试预编译模板与正则替换结果一致"""
+
+    @pytest.mark.parametrize("behavior", ["keep", "empty"])
+    def test_same_as_substitute(self, behavior):
+        """渲染结果与substitute_variables一致"""
+        values = {"job": "Python工程师", "name": None}
+        assert compile_template(TEMPLATE).render(values, behavior) == substitute_variables(
+            TEMPLATE, values, behavior
+        )
+
+    def test_value_not_substituted_again(self):
+        """变量值中的占位符不会被再次替换"""
+        assert compile_template("${a}").render({"a": "${b}", "b": "x"}) == "${b}"
+
+    def test_missing_error(self):
+        """missing_key_behavior=error时缺失变量抛出KeyError"""
+        with pytest.raises(KeyError):
+            compile_template(TEMPLATE).render({"job": "x", "name": "y"}, "error")
+
+    def test_no_placeholder(self):
+        """没有占位符时原样返回"""
+        assert compile_template("纯文本").render({}) == "纯文本"
@@ -0,0 +1,40 @@
+"""
+测试知识库Embedding生成服务
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from app.models.job_knowledge_base import JobKnowledgeBase
+from app.services.knowledge_embedding_service import KnowledgeEmbeddingService
+
+
+@pytest.fixture
+def mock_db():
+    """模拟数据库会话"""
+    return AsyncMock()
+
+
+@pytest.fixture
+def embedding_service(mock_db):
+    """创建embedding服务实例（替换embedding客户端）"""
+    with patch("app.services.knowledge_embedding_service.get_embedding") as get_embedding:
+        get_embedding.return_value = MagicMock(embed_texts=AsyncMock(return_value=[[0.1], [0.2]]))
+        return KnowledgeEmbeddingService(mock_db)
+
+
+@pytest.mark.asyncio
+async def test_embed_in_batch_skips_missing(embedding_service, mock_db):
+    """不存在的记录计为跳过，只更新查到的记录"""
+    found_ids = [uuid4(), uuid4()]
+    select_result = MagicMock()
+    select_result.all.return_value = [(found_ids[0], "问题一"), (found_ids[1], "问题二")]
+    mock_db.execute.return_value = select_result
+
+    counts = await embedding_service._embed_in_batch(
+        JobKnowledgeBase, "question", "question_embedding", found_ids + [uuid4()], uuid4()
+    )
+
+    assert counts == (2, 1)
+    embedding_service.embedding_client.embed_texts.assert_awaited_once()
+    mock_db.commit.assert_awaited_once()
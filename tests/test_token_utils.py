@@ -0,0 +1,38 @@
+"""
+测试token估算与对话历史裁剪
+"""
+from app.utils.token_utils import estimate_tokens, trim_history
+
+
+class TestEstimateTokens:
+    """测试estimate_tokens"""
+
+    def test_mixed_cjk_ascii(self):
+        """CJK字符每个计1个token，其余字符约4个计1个token"""
+        assert estimate_tokens("你好") == 2
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("你好abcdefgh") == 4
+
+    def test_empty(self):
+        """空文本为0"""
+        assert estimate_tokens("") == 0
+
+
+class TestTrimHistory:
+    """测试trim_history"""
+
+    def test_keeps_latest_within_budget_in_order(self):
+        """从最新一条往前保留，结果仍为时间正序"""
+        lines = ["第一条消息", "第二条消息", "第三条消息"]
+
+        assert trim_history(lines, max_tokens=10) == ["第二条消息", "第三条消息"]
+
+    def test_latest_kept_when_over_budget(self):
+        """最新一条单独超出预算时仍保留"""
+        lines = ["短", "很" * 50]
+
+        assert trim_history(lines, max_tokens=10) == ["很" * 50]
+
+    def test_empty(self):
+        """空列表返回空列表"""
+        assert trim_history([], max_tokens=10) == []